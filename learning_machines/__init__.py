@@ -1,3 +1,6 @@
 from .task0_g6 import run_all_actions
+from .local_sim import LocalRobobo
+from .parallel_runs import run_all_actions_parallel
+from .config import ControllerConfig, SIMULATION, HARDWARE
 
-__all__ = ("run_all_actions",)
+__all__ = ("run_all_actions", "LocalRobobo", "run_all_actions_parallel", "ControllerConfig", "SIMULATION", "HARDWARE")
@@ -0,0 +1,100 @@
+"""asyncio front end for IRobobo.
+
+Every sensor read on IRobobo is a blocking round-trip. AsyncRobobo runs
+them on a bounded thread pool and exposes awaitable versions, so
+independent reads can be ``asyncio.gather``-ed and a full sensor
+snapshot costs about one round-trip instead of one per sensor.
+
+    async with AsyncRobobo(rob) as arob:
+        snapshot = await arob.snapshot()
+
+CoppeliaSim's remote API client is not safe to share between threads, and
+LocalRobobo's virtual clock and move queue are shared state, so calls on
+anything but a HardwareRobobo are serialised; the concurrency pays off on
+the hardware.
+"""
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from robobo_interface import HardwareRobobo, IRobobo
+
+from .instrument import unwrap
+
+# Reads gathered by snapshot(); the default pool runs all of them at once
+SNAPSHOT_READS = 7
+
+
+class AsyncRobobo:
+    """Awaitable sensor reads on top of a blocking IRobobo."""
+
+    def __init__(self, rob: IRobobo, max_workers: int = SNAPSHOT_READS):
+        self.rob = rob
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="robobo")
+        self._lock = None if isinstance(unwrap(rob), HardwareRobobo) else threading.Lock()
+
+    def _blocking(self, method, *args):
+        if self._lock is None:
+            return method(*args)
+        with self._lock:
+            return method(*args)
+
+    async def _call(self, method, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(self._blocking, method, *args))
+
+    async def read_irs(self):
+        return await self._call(self.rob.read_irs)
+
+    async def get_image_front(self):
+        return await self._call(self.rob.get_image_front)
+
+    async def read_accel(self):
+        return await self._call(self.rob.read_accel)
+
+    async def read_orientation(self):
+        return await self._call(self.rob.read_orientation)
+
+    async def read_wheels(self):
+        return await self._call(self.rob.read_wheels)
+
+    async def read_phone_pan(self):
+        return await self._call(self.rob.read_phone_pan)
+
+    async def read_phone_tilt(self):
+        return await self._call(self.rob.read_phone_tilt)
+
+    async def snapshot(self):
+        """Read every sensor concurrently and return them in a dict."""
+        irs, image, pan, tilt, accel, orientation, wheels = await asyncio.gather(
+            self.read_irs(),
+            self.get_image_front(),
+            self.read_phone_pan(),
+            self.read_phone_tilt(),
+            self.read_accel(),
+            self.read_orientation(),
+            self.read_wheels(),
+        )
+        return {
+            'irs': irs,
+            'image': image,
+            'pan': pan,
+            'tilt': tilt,
+            'accel': accel,
+            'orientation': orientation,
+            'wheels': wheels,
+        }
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    async def aclose(self):
+        """close() without blocking the event loop while in-flight reads finish."""
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
@@ -0,0 +1,255 @@
+"""Lockstep simulation of N robots for fast controller evaluation.
+
+BatchSimulation holds the poses of N robots as arrays and reads all 8 IR
+sensors of every robot with one vectorized ray cast. BatchController is
+the task0_group_6 control law applied to an (N, 8) array of readings, with
+every threshold and motion primitive allowed to differ per robot, so one
+run_batch call evaluates N controller variants at once.
+
+Robots advance together one controller step at a time. Every sleep in
+task0_group_6 directly follows a move, so a step is a short list of
+(left, right, millis, sleep) segments that are integrated in closed form
+with the same arc model as LocalRobobo; a single robot reproduces a
+LocalRobobo episode.
+"""
+import numpy as np
+
+from .config import SIMULATION
+from .decisions import ThresholdVectors, config_thresholds, decide
+from .local_sim import ARENAS, ROBOT_RADIUS, integrate_arcs, ir_readings, wall_distances
+
+# Upper bound on move/sleep segments a single controller step can issue
+MAX_SEGMENTS = 12
+
+
+class BatchSimulation:
+    """N independent robots in the same arena, each with its own clock."""
+
+    def __init__(self, n, arena="similar_to_irl_gp", starts=None, sensor_model=None):
+        self.n = n
+        self.arena = arena
+        self.sensor_model = sensor_model
+        self.walls = np.asarray(ARENAS[arena]['walls'], dtype=float)
+        if starts is None:
+            starts = np.tile(ARENAS[arena]['start'], (n, 1))
+        self.starts = np.asarray(starts, dtype=float).reshape(n, 3)
+        self.reset()
+
+    def reset(self):
+        self.x, self.y, self.heading = (col.copy() for col in self.starts.T)
+        self.time = np.zeros(self.n)
+        self.active = np.ones(self.n, dtype=bool)
+        self.in_contact = np.zeros(self.n, dtype=bool)
+        self.collisions = np.zeros(self.n, dtype=int)
+        self.distance = np.zeros(self.n)
+
+    def read_irs(self, mask=None):
+        """IR readings of the selected robots as an (n, 8) array."""
+        idx = slice(None) if mask is None else np.flatnonzero(mask)
+        readings = ir_readings(self.x[idx], self.y[idx], self.heading[idx], self.walls)
+        return readings if self.sensor_model is None else self.sensor_model(readings)
+
+    def run_segment(self, mask, left_speed, right_speed, millis, sleep):
+        """``move(left, right, millis)`` then ``sleep(sleep)`` for the robots in ``mask``.
+
+        Speeds and durations are arrays with one entry per selected robot.
+        """
+        idx = np.flatnonzero(mask)
+        duration = np.minimum(millis / 1000, sleep)
+        driving = duration > 0
+        d = idx[driving]
+        if d.size:
+            x, y, heading, hit, travelled = integrate_arcs(
+                self.x[d], self.y[d], self.heading[d],
+                left_speed[driving], right_speed[driving], duration[driving], self.walls,
+            )
+            self.collisions[d] += hit & ~self.in_contact[d]
+            self.in_contact[d] = hit
+            self.x[d], self.y[d], self.heading[d] = x, y, heading
+            self.distance[d] += travelled
+        self.time[idx] += sleep
+
+
+def random_starts(arena, n, rng=None, clearance=ROBOT_RADIUS + 0.08):
+    """``n`` start poses for ``arena``: its usual start, then random free poses.
+
+    A pose is free when every wall is at least ``clearance`` away, which
+    also rules out the inside of the arena's obstacles.
+    """
+    rng = np.random.default_rng(rng)
+    walls = np.asarray(ARENAS[arena]['walls'], dtype=float)
+    low = walls[:, [0, 1]].min(axis=0) + clearance
+    high = walls[:, [0, 1]].max(axis=0) - clearance
+    starts = [ARENAS[arena]['start']]
+    while len(starts) < n:
+        points = rng.uniform(low, high, size=(4 * n, 2))
+        points = points[wall_distances(points, walls) >= clearance]
+        headings = rng.uniform(-np.pi, np.pi, size=len(points))
+        starts.extend(zip(points[:, 0], points[:, 1], headings))
+    return np.array(starts[:n], dtype=float)
+
+
+def config_params(config):
+    """The batch_params entries of one ControllerConfig."""
+    dodge, big, back_c = config_thresholds(config)
+    return {
+        'dodge': dodge,
+        'big': big,
+        'back_c': back_c,
+        'consecutive': config.consecutive,
+        'move_back': config.move_back,
+        'turn_right': config.turn_right,
+        'turn_left': config.turn_left,
+        'move_forward': config.move_forward,
+    }
+
+
+def batch_params(n, config=SIMULATION, **overrides):
+    """Per-robot controller parameters, defaulting to those of ``config``.
+
+    Overrides may be scalars, tuples (broadcast to every robot) or arrays
+    with a leading dimension of ``n``.
+    """
+    params = config_params(config)
+    params.update(overrides)
+    shapes = {'dodge': (5,), 'big': (3,), 'move_back': (3,), 'turn_right': (3,),
+              'turn_left': (3,), 'move_forward': (3,)}
+    return {
+        key: np.broadcast_to(np.asarray(value, dtype=float), (n,) + shapes.get(key, ())).copy()
+        for key, value in params.items()
+    }
+
+
+def stacked_params(configs, repeat=1):
+    """batch_params for a list of ControllerConfigs, each repeated ``repeat`` times in a row."""
+    per_config = [config_params(config) for config in configs]
+    n = len(configs) * repeat
+    return batch_params(n, **{key: np.repeat([p[key] for p in per_config], repeat, axis=0) for key in per_config[0]})
+
+
+class BatchController:
+    """task0_group_6 decision logic over an (N, 8) array of IR readings.
+
+    Each decision fills a per-robot plan of (left, right, millis, sleep)
+    segments reproducing the move/sleep sequence task0_group_6 issues for
+    that step.
+    """
+
+    def __init__(self, n, params=None):
+        self.n = n
+        self.params = params if params is not None else batch_params(n)
+        self.plan = np.zeros((n, MAX_SEGMENTS, 4))
+        self.plan_len = np.zeros(n, dtype=int)
+        self.steps = np.zeros(n, dtype=int)
+        self.obstacle_dodges = np.zeros(n, dtype=int)
+        self.wall_dodges = np.zeros(n, dtype=int)
+        self.consecutive_obstacle = np.zeros(n, dtype=int)
+        self.consecutive_wall = np.zeros(n, dtype=int)
+
+    def _push(self, mask, primitive=None, left=None, right=None, millis=None, sleep=0.0):
+        idx = np.flatnonzero(mask)
+        if not idx.size:
+            return
+        if primitive is not None:
+            left, right, millis = self.params[primitive][idx].T
+        pos = self.plan_len[idx]
+        self.plan[idx, pos] = np.stack(np.broadcast_arrays(left, right, millis, sleep), axis=-1)
+        self.plan_len[idx] += 1
+
+    def decide(self, irs, mask):
+        """Plan the next step for the robots in ``mask`` given readings (N, 8).
+
+        Returns the (wall_dodge, obstacle_dodge) flags of this step.
+        """
+        p = self.params
+        self.plan_len[mask] = 0
+
+        d = decide(irs, ThresholdVectors(p['dodge'], p['big'], p['back_c']))
+
+        escape_obstacle = mask & (self.consecutive_obstacle >= p['consecutive'])
+        self._push(escape_obstacle & d.back_blocked, left=-50, right=-50, millis=800, sleep=1)
+        self._push(escape_obstacle & ~d.back_blocked, 'move_back', sleep=1)
+        self.consecutive_obstacle[escape_obstacle] = 0
+
+        escape_wall = mask & (self.consecutive_wall >= p['consecutive'])
+        self._push(escape_wall, left=0, right=0, millis=0, sleep=1)
+        self._push(escape_wall, left=-100, right=-100, millis=5000)
+        self.consecutive_wall[escape_wall] = 0
+
+        big = mask & d.wall_dodge
+        obstacle = mask & d.obstacle_dodge
+        forward = mask & d.forward
+
+        self._push(big, 'move_back', sleep=1.5)
+        self._push(big, left=0, right=0, millis=0)
+        self._push(obstacle, left=0, right=0, millis=0, sleep=0.1)
+        turn_left = mask & d.turn_left
+        self._push(turn_left, 'turn_left', sleep=0.85)
+        self._push((big | obstacle) & ~turn_left, 'turn_right', sleep=0.85)
+
+        self.wall_dodges[big] += 1
+        self.consecutive_obstacle[big] = 0
+        self.consecutive_wall[big] += 1
+        self.obstacle_dodges[obstacle] += 1
+        self.consecutive_obstacle[obstacle] += 1
+        self.consecutive_wall[obstacle] = 0
+        self.consecutive_obstacle[forward] = 0
+        self.consecutive_wall[forward] = 0
+
+        clear = mask & d.clear_space
+        self._push(clear, left=100, right=100, millis=1000, sleep=0.5)
+        self._push(forward & ~clear, 'move_forward', sleep=0.11)
+
+        self._push(mask & d.back_blocked, 'move_forward', sleep=1)
+        back_left = mask & d.back_left
+        self._push(back_left, 'turn_right', sleep=0.5)
+        self._push(back_left, 'move_forward', sleep=0.11)
+        back_right = mask & d.back_right
+        self._push(back_right, 'turn_left', sleep=0.5)
+        self._push(back_right, 'move_forward', sleep=0.11)
+
+        # task0_group_6 stops and settles before reading at step 1
+        self._push(mask & (self.steps == 0), left=0, right=0, millis=0, sleep=1.5)
+        self.steps[mask] += 1
+        return big.astype(int), obstacle.astype(int)
+
+
+def run_batch(sim, controller, steps=100, record=False, max_collisions=None):
+    """Run ``steps`` controller steps on every robot of ``sim``.
+
+    Returns a dict of per-robot arrays; with ``record`` it also holds the
+    (N, steps, 10) readings in the same layout save_to_csv writes. With
+    ``max_collisions``, a robot stops as soon as it collides more often
+    than that, and 'terminated' marks the robots that were stopped early.
+    """
+    n = sim.n
+    readings = np.zeros((n, steps, 10)) if record else None
+    sim.time[sim.active] += 1  # task0_group_6 sleeps 1 s after play_simulation
+    for step in range(steps):
+        mask = sim.active.copy()
+        if not mask.any():
+            break
+        irs = np.zeros((n, 8))
+        irs[mask] = sim.read_irs(mask)
+        wall, obstacle = controller.decide(irs, mask)
+        if record:
+            readings[mask, step] = np.concatenate([irs, wall[:, None], obstacle[:, None]], axis=1)[mask]
+        for j in range(controller.plan_len[mask].max()):
+            sel = mask & (controller.plan_len > j)
+            left, right, millis, sleep = controller.plan[sel, j].T
+            sim.run_segment(sel, left, right, millis, sleep)
+        if max_collisions is not None:
+            sim.active &= sim.collisions <= max_collisions
+
+    result = {
+        'obstacle_dodges': controller.obstacle_dodges.copy(),
+        'wall_dodges': controller.wall_dodges.copy(),
+        'total_steps': controller.steps.copy(),
+        'collisions': sim.collisions.copy(),
+        'distance': sim.distance.copy(),
+        'sim_time': sim.time.copy(),
+        'terminated': ~sim.active,
+    }
+    if record:
+        result['sensor_readings'] = readings
+    return result
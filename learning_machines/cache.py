@@ -0,0 +1,75 @@
+"""Content-addressed identifiers and a result store keyed by them.
+
+An identifier is the SHA-256 of a canonical JSON form of everything that
+determines an outcome (resolved config, seed, steps, simulator settings).
+The same inputs give the same ID in any process or session. A
+ResultCache stores one JSON file per ID, so a sweep, an optimizer
+or a seeded episode asked for something already computed gets the
+stored result back instead of simulating it again.
+"""
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+ID_LENGTH = 16
+
+# ControllerConfig fields that do not change what a single episode does
+EPISODE_INDEPENDENT = ('multiple_runs', 'count_runs', 'timed')
+
+
+def _plain(value):
+    if hasattr(value, 'to_dict'):
+        return value.to_dict()
+    if isinstance(value, tuple):
+        return list(value)
+    raise TypeError(f"Cannot identify {type(value).__name__} by content")
+
+
+def canonical(spec):
+    """The canonical JSON text of ``spec``: sorted keys, no whitespace, tuples as lists."""
+    return json.dumps(spec, sort_keys=True, separators=(',', ':'), default=_plain)
+
+
+def content_id(spec):
+    return hashlib.sha256(canonical(spec).encode()).hexdigest()[:ID_LENGTH]
+
+
+def config_spec(config):
+    """The settings of a ControllerConfig that determine an episode."""
+    return {key: value for key, value in config.to_dict().items() if key not in EPISODE_INDEPENDENT}
+
+
+def write_json(path, data):
+    """Write ``data`` as JSON to ``path`` through a temporary file, so readers never see half of it."""
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    with os.fdopen(fd, 'w') as file:
+        json.dump(data, file, default=_plain)
+    os.replace(tmp, path)
+
+
+class ResultCache:
+    """JSON results in ``directory``, one file per content ID; safe to share between processes."""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def path(self, key):
+        return self.directory / f"{key}.json"
+
+    def get(self, key):
+        """The stored result for ``key``, or None."""
+        try:
+            with open(self.path(key)) as file:
+                return json.load(file)['result']
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            return None
+
+    def put(self, key, result, spec=None):
+        write_json(self.path(key), {'id': key, 'spec': spec, 'result': result})
+
+    def __contains__(self, key):
+        return self.path(key).exists()
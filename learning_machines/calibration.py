@@ -0,0 +1,144 @@
+"""Sim-to-hardware calibration of the IR sensors.
+
+Simulated and real IR sensors answer the same distance with different
+values. That is why SIMULATION and HARDWARE have separate thresholds
+(FrontC 31 against 11, big dodge 250 against 90). fit_sensor_model
+learns a per-sensor mapping from recorded runs of both:
+
+    hardware = hw_floor + gain * max(sim - sim_floor, 0) ** exponent
+
+Sim and hardware runs are not paired step by step, so the curve is
+fitted to matching quantiles of the two distributions, one least-squares
+line per sensor in log-log space, all sensors at once. That assumes both
+sets of runs saw obstacles at similar distances, for instance the same
+arena and controller. The floors are each sensor's median, the
+reading with nothing in range.
+
+An IRSensorModel can be applied to the simulators
+(``LocalRobobo(sensor_model=model)``, ``BatchSimulation(...,
+sensor_model=model)``, ``sweep.evaluate(..., sensor_model=model)``),
+which then read like the hardware and can be tuned against HARDWARE
+thresholds directly. It can also translate the thresholds of a config
+tuned in plain simulation with ``hardware_config``.
+
+    python -m learning_machines.calibration grouped_data --out ir_model.json
+"""
+import argparse
+import json
+
+import numpy as np
+
+from .config import HARDWARE, THRESHOLD_FIELDS
+from .local_sim import IR_NAMES
+from .replay import find_runs
+from .report import load_run
+
+QUANTILES = np.linspace(0.5, 0.999, 200)
+FLOOR_QUANTILE = 0.5
+MIN_OFFSET = 1e-3   # readings closer than this to the floor carry no curve information
+
+
+class IRSensorModel:
+    """Per-sensor power-law mapping of simulated IR readings to hardware-like ones."""
+
+    def __init__(self, sim_floor, hw_floor, gain, exponent, hw_max, name="ir_model"):
+        self.sim_floor = np.asarray(sim_floor, dtype=float)
+        self.hw_floor = np.asarray(hw_floor, dtype=float)
+        self.gain = np.asarray(gain, dtype=float)
+        self.exponent = np.asarray(exponent, dtype=float)
+        self.hw_max = np.asarray(hw_max, dtype=float)
+        self.name = name
+
+    def __call__(self, irs):
+        """Hardware-like readings for simulated ``irs`` of shape (8,) or (N, 8)."""
+        return self.apply(irs)
+
+    def apply(self, values, sensors=slice(None)):
+        """Map simulated values of the sensors at indices ``sensors`` (all eight by default)."""
+        offset = np.maximum(np.asarray(values, dtype=float) - self.sim_floor[sensors], 0.0)
+        return np.minimum(self.hw_floor[sensors] + self.gain[sensors] * offset ** self.exponent[sensors],
+                          self.hw_max[sensors])
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'sensors': IR_NAMES,
+            **{key: getattr(self, key).tolist() for key in ('sim_floor', 'hw_floor', 'gain', 'exponent', 'hw_max')},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['sim_floor'], data['hw_floor'], data['gain'], data['exponent'], data['hw_max'],
+                   data.get('name', "ir_model"))
+
+    def to_file(self, filename):
+        with open(filename, 'w') as file:
+            json.dump(self.to_dict(), file, indent=2)
+
+    @classmethod
+    def from_file(cls, filename):
+        with open(filename) as file:
+            return cls.from_dict(json.load(file))
+
+
+def fit_sensor_model(sim_irs, hw_irs, quantiles=QUANTILES, name="ir_model"):
+    """Fit an IRSensorModel to (n, 8) simulated and (m, 8) hardware readings.
+
+    Sensors whose readings never leave the floor in one of the sets keep
+    an exponent and gain of 1, a plain shift between the floors.
+    """
+    sim = np.asarray(sim_irs, dtype=float)
+    hw = np.asarray(hw_irs, dtype=float)
+    sim_floor = np.nanquantile(sim, FLOOR_QUANTILE, axis=0)
+    hw_floor = np.nanquantile(hw, FLOOR_QUANTILE, axis=0)
+    dx = np.nanquantile(sim, quantiles, axis=0) - sim_floor   # (Q, 8)
+    dy = np.nanquantile(hw, quantiles, axis=0) - hw_floor
+    weights = ((dx > MIN_OFFSET) & (dy > MIN_OFFSET)).astype(float)
+    x = np.log(np.maximum(dx, MIN_OFFSET))
+    y = np.log(np.maximum(dy, MIN_OFFSET))
+
+    count = weights.sum(axis=0)
+    mean_x = (weights * x).sum(axis=0) / np.maximum(count, 1)
+    mean_y = (weights * y).sum(axis=0) / np.maximum(count, 1)
+    sxx = (weights * (x - mean_x) ** 2).sum(axis=0)
+    sxy = (weights * (x - mean_x) * (y - mean_y)).sum(axis=0)
+    fitted = (count >= 2) & (sxx > 0)
+    exponent = np.where(fitted, sxy / np.where(fitted, sxx, 1), 1.0)
+    gain = np.where(fitted, np.exp(mean_y - exponent * mean_x), 1.0)
+    return IRSensorModel(sim_floor, hw_floor, gain, exponent, np.nanmax(hw, axis=0), name)
+
+
+def load_readings(roots):
+    """(sim_irs, hw_irs) of every run below ``roots``, split by the runs' 'simulation' metadata."""
+    sim, hw = [], []
+    for root in roots:
+        for path in find_runs(root):
+            metadata, irs, _, _ = load_run(path)
+            simulated = metadata.get('simulation', '_hard' not in path.name)
+            (sim if simulated else hw).append(irs)
+    empty = np.zeros((0, len(IR_NAMES)))
+    return (np.concatenate(sim) if sim else empty), (np.concatenate(hw) if hw else empty)
+
+
+def hardware_config(config, model, base=HARDWARE):
+    """``base`` with the thresholds of sim-tuned ``config`` mapped through ``model``."""
+    index = {name: i for i, name in enumerate(IR_NAMES)}
+    overrides = {}
+    for field in THRESHOLD_FIELDS:
+        thresholds = getattr(config, field)
+        mapped = model.apply(list(thresholds.values()), [index[sensor] for sensor in thresholds])
+        overrides[field] = dict(zip(thresholds, np.round(mapped, 1).tolist()))
+    return base.with_overrides(overrides)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fit a sim-to-hardware IR sensor model from recorded runs")
+    parser.add_argument('roots', nargs='+', help="grouped_data, batches or run directories with both sim and hardware runs")
+    parser.add_argument('--out', default='ir_model.json')
+    args = parser.parse_args()
+    sim_irs, hw_irs = load_readings(args.roots)
+    if not len(sim_irs) or not len(hw_irs):
+        raise SystemExit(f"Need both sim and hardware runs, found {len(sim_irs)} sim and {len(hw_irs)} hardware steps")
+    model = fit_sensor_model(sim_irs, hw_irs)
+    model.to_file(args.out)
+    print(json.dumps(model.to_dict(), indent=2))
@@ -0,0 +1,197 @@
+"""Background capture of the front camera into a fixed pool of buffers.
+
+FrameGrabber calls ``rob.get_image_front()`` on its own thread at a
+fixed rate and copies each frame into one of ``pool_size`` preallocated
+arrays, so vision code always has a recent frame at hand without
+waiting on the camera round-trip. The controller borrows the newest
+frame, read-only and without a copy:
+
+    with FrameGrabber(rob, rate_hz=15, save_dir=grouped_data_dir, save_hz=1) as grabber:
+        ...
+        with grabber.latest() as frame:
+            if frame is not None:
+                blobs = detect(frame.image)
+
+A borrowed buffer is not reused until it is released; if every buffer is
+borrowed or waiting to be saved, the grabber drops the new frame rather
+than block. With ``save_dir`` set, frames are written on another thread at
+``save_hz``, as JPEG, PNG or raw .npy; frames are skipped rather than queued
+when the disk falls behind.
+
+As with SensorSampler, this suits HardwareRobobo: CoppeliaSim's remote
+API client is not thread-safe, and LocalRobobo has no camera.
+"""
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import NamedTuple
+
+import cv2
+import numpy as np
+
+ENCODINGS = ('jpg', 'png', 'npy')
+
+
+class Frame(NamedTuple):
+    image: np.ndarray   # read-only view of a pool buffer
+    index: int          # frames captured before this one
+    timestamp: float    # time.monotonic() at capture
+    slot: int
+
+
+class FrameGrabber:
+    """Captures front camera frames of ``rob`` at ``rate_hz`` into ``pool_size`` reusable buffers."""
+
+    def __init__(self, rob, rate_hz=15.0, pool_size=4, save_dir=None, save_hz=1.0,
+                 encoding='jpg', jpeg_quality=90):
+        if encoding not in ENCODINGS:
+            raise ValueError(f"Unknown encoding {encoding!r}, expected one of {ENCODINGS}")
+        self.rob = rob
+        self.period = 1.0 / rate_hz
+        self.pool_size = pool_size
+        self.save_dir = Path(save_dir) if save_dir is not None else None
+        self.save_period = 1.0 / save_hz if save_hz else None
+        self.encoding = encoding
+        self.jpeg_quality = jpeg_quality
+        self.buffers = None
+        self.captured = 0
+        self.dropped = 0
+        self.saved = 0
+        self.save_skipped = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._refs = [0] * pool_size  # borrows plus pending saves, per slot
+        self._latest = None           # Frame of the newest complete buffer
+        self._stop = threading.Event()
+        self._threads = []
+        self._saving = False
+        self._save_queue = queue.Queue(maxsize=max(pool_size - 2, 1))
+
+    def start(self):
+        self._stop.clear()
+        self._threads = [threading.Thread(target=self._capture, name="frame-grabber", daemon=True)]
+        self._saving = self.save_dir is not None and self.save_period is not None
+        if self._saving:
+            self.save_dir.mkdir(parents=True, exist_ok=True)
+            self._threads.append(threading.Thread(target=self._save, name="frame-saver", daemon=True))
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        """Stop capturing and wait for the frames already queued for saving."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _free_slot(self):
+        latest = self._latest.slot if self._latest is not None else None
+        for slot, refs in enumerate(self._refs):
+            if refs == 0 and slot != latest:
+                return slot
+        return None
+
+    def _store(self, image):
+        image = np.asarray(image)
+        if self.buffers is None:
+            self.buffers = np.empty((self.pool_size, *image.shape), dtype=image.dtype)
+        elif image.shape != self.buffers.shape[1:]:
+            raise ValueError(f"Frame shape changed from {self.buffers.shape[1:]} to {image.shape}")
+        with self._lock:
+            slot = self._free_slot()
+        if slot is None:
+            self.dropped += 1
+            return None
+        np.copyto(self.buffers[slot], image)
+        view = self.buffers[slot].view()
+        view.flags.writeable = False
+        frame = Frame(view, self.captured, time.monotonic(), slot)
+        with self._lock:
+            self._latest = frame  # publish only once the buffer is complete
+        self.captured += 1
+        return frame
+
+    def _capture(self):
+        deadline = time.monotonic()
+        next_save = deadline
+        while not self._stop.is_set():
+            try:
+                frame = self._store(self.rob.get_image_front())
+            except Exception:
+                self.errors += 1
+                frame = None
+            if frame is not None and self._saving and frame.timestamp >= next_save:
+                next_save = frame.timestamp + self.save_period
+                self._queue_save(frame)
+            deadline += self.period
+            self._stop.wait(max(deadline - time.monotonic(), 0.0))
+        if self._saving:
+            self._save_queue.put(None)
+
+    def _queue_save(self, frame):
+        with self._lock:
+            self._refs[frame.slot] += 1
+        try:
+            self._save_queue.put_nowait(frame)
+        except queue.Full:
+            self.save_skipped += 1
+            self.release(frame)
+
+    def _save(self):
+        while True:
+            frame = self._save_queue.get()
+            if frame is None:
+                return
+            try:
+                filename = self.save_dir / f"frame_{frame.index:06d}.{self.encoding}"
+                if self.encoding == 'npy':
+                    np.save(filename, frame.image)
+                elif self.encoding == 'jpg':
+                    cv2.imwrite(str(filename), frame.image, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+                else:
+                    cv2.imwrite(str(filename), frame.image)
+                self.saved += 1
+            except Exception:
+                self.errors += 1
+            finally:
+                self.release(frame)
+
+    def acquire(self):
+        """Borrow the newest frame (None before the first one); give it back with release()."""
+        with self._lock:
+            frame = self._latest
+            if frame is not None:
+                self._refs[frame.slot] += 1
+        return frame
+
+    def release(self, frame):
+        with self._lock:
+            self._refs[frame.slot] -= 1
+
+    @contextmanager
+    def latest(self):
+        """The newest frame, borrowed for the duration of the with block."""
+        frame = self.acquire()
+        try:
+            yield frame
+        finally:
+            if frame is not None:
+                self.release(frame)
+
+    def stats(self):
+        return {
+            'captured': self.captured,
+            'dropped': self.dropped,
+            'saved': self.saved,
+            'save_skipped': self.save_skipped,
+            'errors': self.errors,
+        }
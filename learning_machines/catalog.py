@@ -0,0 +1,198 @@
+"""SQLite index of every run under grouped_data.
+
+Catalog.scan walks the grouped_data tree once, ingests each run
+directory's metadata and per-sensor summary statistics into one row, and
+on later scans only touches directories that are new or have changed.
+Queries over thousands of runs are then plain SQL:
+
+    catalog = Catalog()
+    catalog.scan()
+    catalog.find(simulation=1, arena="similar_to_irl_gp", dodge_front_c=31)
+    catalog.query("SELECT arena, AVG(wall_dodges) FROM runs GROUP BY arena")
+"""
+import csv
+import os
+import re
+import sqlite3
+from pathlib import Path
+
+import numpy as np
+
+from data_files import FIGRURES_DIR
+
+from .episode_format import EXTENSION, load_episode
+from .local_sim import IR_NAMES
+from .task0_g6 import load_meta_data
+
+GROUPED_DATA_DIR = FIGRURES_DIR / "grouped_data"
+DEFAULT_DB = GROUPED_DATA_DIR / "catalog.sqlite"
+
+# {date_time}_{sim|hard}_{arena}[_run{n}] from task0_g6, or {sim|hard}_{arena}_{run_id} for seeded runs (see runs)
+RUN_DIR_PATTERN = re.compile(
+    r'^(?=\d{8}-\d{6}_|(?:sim|hard)_.+_[0-9a-f]{16}$)'
+    r'(?:(?P<date_time>\d{8}-\d{6})_)?(?P<kind>sim|hard)_(?P<arena>.+?)'
+    r'(?:_run(?P<run>\d+))?(?:_(?P<run_id>[0-9a-f]{16}))?$'
+)
+
+DODGE_COLUMNS = {'FrontC': 'front_c', 'FrontRR': 'front_rr', 'FrontLL': 'front_ll', 'FrontL': 'front_l', 'FrontR': 'front_r'}
+STAT_COLUMNS = [f"{stat}_{name.lower()}" for name in IR_NAMES for stat in ('mean', 'max')]
+
+COLUMNS = [
+    ('path', 'TEXT PRIMARY KEY'),
+    ('batch', 'TEXT'),
+    ('date_time', 'TEXT'),
+    ('simulation', 'INTEGER'),
+    ('arena', 'TEXT'),
+    ('run', 'INTEGER'),
+    ('mtime', 'REAL'),
+    ('total_steps', 'INTEGER'),
+    ('obstacle_dodges', 'INTEGER'),
+    ('wall_dodges', 'INTEGER'),
+    ('preemptions', 'INTEGER'),
+] + [(f"dodge_{column}", 'REAL') for column in DODGE_COLUMNS.values()] \
+  + [(f"big_{column}", 'REAL') for column in list(DODGE_COLUMNS.values())[:3]] \
+  + [(column, 'REAL') for column in STAT_COLUMNS]
+
+# Per-generation progress of optimizer runs, one row per (optimization, generation)
+GENERATION_COLUMNS = [
+    ('optimization', 'TEXT'),
+    ('generation', 'INTEGER'),
+    ('evaluations', 'INTEGER'),
+    ('best_fitness', 'REAL'),
+    ('mean_fitness', 'REAL'),
+    ('median_fitness', 'REAL'),
+    ('sigma', 'REAL'),
+    ('terminated', 'REAL'),
+    ('wall_time', 'REAL'),
+    ('best_config', 'TEXT'),
+]
+
+
+def _dir_mtime(run_dir):
+    return max((entry.stat().st_mtime for entry in os.scandir(run_dir) if entry.is_file()), default=0.0)
+
+
+def _load_run(run_dir):
+    """Metadata and an (n, 8) IR array for one run directory."""
+    episodes = sorted(run_dir.glob(f"*{EXTENSION}"))
+    if episodes:
+        header, records = load_episode(episodes[0])
+        return header['metadata'], np.asarray(records['irs'], dtype=float)
+    meta_files = [run_dir / 'meta_data_final.json', run_dir / 'meta_data_final.txt']
+    metadata = next((load_meta_data(path) for path in meta_files if path.exists()), {})
+    irs = np.zeros((0, len(IR_NAMES)))
+    data_files = sorted(run_dir.glob('data_*.csv'))
+    if data_files:
+        with open(data_files[0], newline='') as csvfile:
+            rows = list(csv.reader(csvfile))[1:]
+        if rows:
+            irs = np.array([[float(value or 'nan') for value in row[:len(IR_NAMES)]] for row in rows])
+    return metadata, irs
+
+
+def summarize_run(run_dir):
+    """One catalog row (column -> value) for a run directory, or None if it is not one."""
+    run_dir = Path(run_dir)
+    match = RUN_DIR_PATTERN.match(run_dir.name)
+    if match is None:
+        return None
+    metadata, irs = _load_run(run_dir)
+    dodge = metadata.get('sensor_dodge_thresholds') or {}
+    big = metadata.get('wall_dodge_thresholds') or {}
+    row = {
+        'path': str(run_dir),
+        'batch': run_dir.parent.name if run_dir.parent.name.startswith('runs') else None,
+        'date_time': match['date_time'] or metadata.get('date_time'),
+        'simulation': int(match['kind'] == 'sim'),
+        'arena': match['arena'],
+        'run': int(match['run']) if match['run'] is not None else None,
+        'mtime': _dir_mtime(run_dir),
+        'total_steps': metadata.get('total_steps', len(irs)),
+        'obstacle_dodges': metadata.get('obstacle_dodges'),
+        'wall_dodges': metadata.get('wall_dodges'),
+        'preemptions': metadata.get('preemptions'),
+    }
+    for key, column in DODGE_COLUMNS.items():
+        row[f"dodge_{column}"] = dodge.get(key)
+        if key in ('FrontC', 'FrontRR', 'FrontLL'):
+            row[f"big_{column}"] = big.get(key)
+    if len(irs):
+        means = np.nanmean(irs, axis=0)
+        maxes = np.nanmax(irs, axis=0)
+        for i, name in enumerate(IR_NAMES):
+            row[f"mean_{name.lower()}"] = float(means[i])
+            row[f"max_{name.lower()}"] = float(maxes[i])
+    return row
+
+
+class Catalog:
+    """Incrementally maintained SQLite table of runs."""
+
+    def __init__(self, db_path=DEFAULT_DB):
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(db_path))
+        self.db.row_factory = sqlite3.Row
+        columns = ', '.join(f"{name} {kind}" for name, kind in COLUMNS)
+        self.db.execute(f"CREATE TABLE IF NOT EXISTS runs ({columns})")
+        for name in ('batch', 'arena', 'dodge_front_c'):
+            self.db.execute(f"CREATE INDEX IF NOT EXISTS runs_{name} ON runs ({name})")
+        columns = ', '.join(f"{name} {kind}" for name, kind in GENERATION_COLUMNS)
+        self.db.execute(f"CREATE TABLE IF NOT EXISTS generations ({columns}, PRIMARY KEY (optimization, generation))")
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def scan(self, root=GROUPED_DATA_DIR):
+        """Ingest new or changed run directories below ``root``; returns how many were (re)indexed."""
+        known = dict(self.db.execute("SELECT path, mtime FROM runs").fetchall())
+        names = [name for name, _ in COLUMNS]
+        insert = f"INSERT OR REPLACE INTO runs ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})"
+        updated = 0
+        for dirpath, dirnames, _ in os.walk(root):
+            for dirname in dirnames:
+                if not RUN_DIR_PATTERN.match(dirname):
+                    continue
+                run_dir = Path(dirpath) / dirname
+                if known.get(str(run_dir)) == _dir_mtime(run_dir):
+                    continue
+                row = summarize_run(run_dir)
+                self.db.execute(insert, [row.get(name) for name in names])
+                updated += 1
+        self.db.commit()
+        return updated
+
+    def log_generation(self, **values):
+        """Record (or replace) one optimizer generation in the generations table."""
+        unknown = set(values) - {name for name, _ in GENERATION_COLUMNS}
+        if unknown:
+            raise KeyError(f"Unknown generation columns: {sorted(unknown)}")
+        names = list(values)
+        self.db.execute(
+            f"INSERT OR REPLACE INTO generations ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})",
+            [values[name] for name in names],
+        )
+        self.db.commit()
+
+    def query(self, sql, params=()):
+        return self.db.execute(sql, params).fetchall()
+
+    def find(self, **filters):
+        """Runs whose columns equal the given values."""
+        unknown = set(filters) - {name for name, _ in COLUMNS}
+        if unknown:
+            raise KeyError(f"Unknown catalog columns: {sorted(unknown)}")
+        where = ' AND '.join(f"{name} = ?" for name in filters) or '1'
+        return self.query(f"SELECT * FROM runs WHERE {where} ORDER BY path", tuple(filters.values()))
+
+
+if __name__ == "__main__":
+    with Catalog() as catalog:
+        print(f"Indexed {catalog.scan()} new or changed runs")
+        print(f"{catalog.query('SELECT COUNT(*) FROM runs')[0][0]} runs in catalog")
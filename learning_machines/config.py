@@ -0,0 +1,145 @@
+"""Immutable controller settings for task0_group_6 and the batch tools.
+
+Everything that used to be a task0_g6 module global lives on a frozen
+ControllerConfig, so sim and hardware settings, or many threshold
+variants, can be used side by side in one process or sent to worker
+processes. SIMULATION and HARDWARE are the two presets; variants are
+derived from them rather than edited in place:
+
+    config = HARDWARE.with_overrides({'sensor_dodge_thresholds.FrontC': 12, 'count_runs': 3})
+    config = ControllerConfig.from_file('robot.json')   # {"preset": "hardware", "wheel_speed": 60}
+"""
+import json
+from dataclasses import dataclass, field, fields, replace
+
+
+class Thresholds(dict):
+    """A read-only dict of sensor name -> threshold."""
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("Thresholds are read-only; derive a new config with ControllerConfig.with_overrides")
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return Thresholds, (dict(self),)
+
+    def __hash__(self):
+        return hash(tuple(sorted(self.items())))
+
+
+THRESHOLD_FIELDS = ('sensor_thresholds', 'sensor_dodge_thresholds', 'big_dodge_thresholds')
+MOTION_FIELDS = ('move_back', 'turn_right', 'turn_left', 'move_forward')
+MOTION_PARTS = ('speed', 'millis')
+SPEED_FIELDS = ('move_back', 'move_forward')   # their speed is wheel_speed
+
+
+@dataclass(frozen=True)
+class ControllerConfig:
+    simulation: bool = True
+    multiple_runs: bool = True
+    count_runs: int = 5
+    arena: str = "similar_to_irl_gp"
+    scheduled: bool = False  # poll IR sensors during maneuvers instead of sleeping blind
+    poll_hz: float = 20
+    sampled: bool = False  # read IR sensors from a background SensorSampler (hardware only)
+    sample_hz: float = 50
+    timed: bool = False  # time every robot call and controller step into timings.json
+    sensor_thresholds: Thresholds = field(default_factory=lambda: {
+        'BackL': 10, 'BackR': 10, 'FrontL': 10, 'FrontR': 10,
+        'FrontC': 10, 'FrontRR': 10, 'BackC': 60, 'FrontLL': 10,
+    })
+    sensor_dodge_thresholds: Thresholds = field(default_factory=lambda: {
+        'FrontC': 31, 'FrontRR': 50, 'FrontLL': 50, 'FrontL': 380, 'FrontR': 380,
+    })
+    big_dodge_thresholds: Thresholds = field(default_factory=lambda: {
+        'FrontC': 250, 'FrontRR': 250, 'FrontLL': 250,
+    })
+    consecutive: int = 5
+    wheel_speed: int = 77  # sets the speed of move_back and move_forward
+    move_back: tuple = (-77, -77, 900)
+    turn_right: tuple = (25, -25, 650)
+    turn_left: tuple = (-25, 25, 650)
+    move_forward: tuple = (77, 77, 350)
+
+    def __post_init__(self):
+        for name in THRESHOLD_FIELDS:
+            object.__setattr__(self, name, Thresholds(getattr(self, name)))
+        for name in MOTION_FIELDS:
+            object.__setattr__(self, name, tuple(getattr(self, name)))
+        # wheel_speed is the one source of the straight moves' speed
+        speed = self.wheel_speed
+        object.__setattr__(self, 'move_back', (-speed, -speed, self.move_back[2]))
+        object.__setattr__(self, 'move_forward', (speed, speed, self.move_forward[2]))
+
+    def with_overrides(self, overrides):
+        """A copy with ``overrides`` applied.
+
+        Keys are field names, ``field.Sensor`` for a single threshold, or
+        ``primitive.speed`` / ``primitive.millis`` for one part of a motion
+        primitive (the speed keeps each wheel's direction). A dict for a
+        threshold field is merged into it. The speeds of move_back and
+        move_forward follow wheel_speed, so only their millis can be set.
+        """
+        names = {f.name for f in fields(self)}
+        changes = {}
+        parts = {}
+        for name, value in overrides.items():
+            name, _, sensor = name.partition('.')
+            if name in SPEED_FIELDS and sensor == 'speed':
+                raise ValueError(f"The speed of {name} is wheel_speed; override that instead")
+            elif name in MOTION_FIELDS and sensor in MOTION_PARTS:
+                parts[name, sensor] = value
+            elif name not in names or (sensor and name not in THRESHOLD_FIELDS):
+                raise KeyError(f"Unknown config setting: {name}{'.' + sensor if sensor else ''}")
+            elif name in THRESHOLD_FIELDS:
+                merged = changes.setdefault(name, dict(getattr(self, name)))
+                if sensor and sensor not in merged:
+                    raise KeyError(f"Unknown sensor in {name}: {sensor}")
+                merged.update({sensor: value} if sensor else value)
+            else:
+                changes[name] = value
+        speed = changes.get('wheel_speed', self.wheel_speed)
+        for name in SPEED_FIELDS:
+            if name in changes and any(abs(value) != speed for value in changes[name][:2]):
+                raise ValueError(f"{name} {tuple(changes[name])} does not match wheel_speed {speed}")
+        for (name, part), value in parts.items():
+            left, right, millis = changes.get(name, getattr(self, name))
+            if part == 'millis':
+                changes[name] = (left, right, value)
+            else:
+                changes[name] = (value if left >= 0 else -value, value if right >= 0 else -value, millis)
+        return replace(self, **changes)
+
+    def to_dict(self):
+        values = {f.name: getattr(self, f.name) for f in fields(self)}
+        return {name: dict(value) if isinstance(value, Thresholds) else value for name, value in values.items()}
+
+    @classmethod
+    def from_file(cls, filename):
+        """Load a JSON config: an optional "preset" name plus overrides (see with_overrides)."""
+        with open(filename) as file:
+            data = json.load(file)
+        preset = data.pop('preset', 'simulation')
+        if preset not in PRESETS:
+            raise KeyError(f"Unknown preset {preset!r}, expected one of {sorted(PRESETS)}")
+        return PRESETS[preset].with_overrides(data)
+
+    def to_file(self, filename):
+        with open(filename, 'w') as file:
+            json.dump(self.to_dict(), file, indent=2)
+
+
+SIMULATION = ControllerConfig()
+
+HARDWARE = ControllerConfig(
+    simulation=False,
+    sensor_dodge_thresholds={'FrontC': 11, 'FrontRR': 15, 'FrontLL': 15, 'FrontL': 80, 'FrontR': 80},
+    big_dodge_thresholds={'FrontC': 90, 'FrontRR': 90, 'FrontLL': 90},
+    wheel_speed=50,
+    move_back=(-50, -50, 900),
+    move_forward=(50, 50, 350),
+)
+
+PRESETS = {'simulation': SIMULATION, 'hardware': HARDWARE}
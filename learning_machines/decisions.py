@@ -0,0 +1,81 @@
+"""The task0_group_6 dodge decisions as array operations.
+
+decide() takes one IR reading (8,) or a stack of them (N, 8) and returns
+every branch task0_group_6 can take for it as boolean arrays, so the
+live controller, the batch simulator and replays of recorded runs all
+make their decisions with the same code, and a whole batch costs a
+single NumPy pass. Thresholds come as vectors in sensor order; the
+vectors of a ControllerConfig are built once and cached.
+"""
+from functools import lru_cache
+from typing import NamedTuple
+
+import numpy as np
+
+# Sensor indices checked by the dodge conditions, in threshold column order
+DODGE_SENSORS = [4, 5, 7, 2, 3]   # FrontC, FrontRR, FrontLL, FrontL, FrontR
+DODGE_KEYS = ['FrontC', 'FrontRR', 'FrontLL', 'FrontL', 'FrontR']
+BIG_DODGE_SENSORS = [4, 5, 7]     # FrontC, FrontRR, FrontLL
+BIG_DODGE_KEYS = ['FrontC', 'FrontRR', 'FrontLL']
+
+CLEAR_SPACE = 5.82   # FrontC below this means nothing ahead (sim median is 5.8457)
+BACK_SIDE = 50       # BackL/BackR above this turns the robot away
+
+
+class ThresholdVectors(NamedTuple):
+    dodge: np.ndarray   # (5,) or (N, 5), DODGE_KEYS order
+    big: np.ndarray     # (3,) or (N, 3), BIG_DODGE_KEYS order
+    back_c: float       # scalar or (N,)
+
+
+class Decision(NamedTuple):
+    wall_dodge: np.ndarray      # big dodge: back up, then turn
+    obstacle_dodge: np.ndarray  # stop and turn
+    forward: np.ndarray         # neither dodge
+    clear_space: np.ndarray     # forward with nothing ahead: sprint
+    turn_left: np.ndarray       # direction of either dodge's turn
+    back_blocked: np.ndarray
+    back_left: np.ndarray
+    back_right: np.ndarray
+
+
+@lru_cache(maxsize=256)
+def config_thresholds(config):
+    """The threshold vectors of a ControllerConfig."""
+    return ThresholdVectors(
+        np.array([config.sensor_dodge_thresholds[key] for key in DODGE_KEYS], dtype=float),
+        np.array([config.big_dodge_thresholds[key] for key in BIG_DODGE_KEYS], dtype=float),
+        float(config.sensor_thresholds['BackC']),
+    )
+
+
+def big_dodge(irs, big):
+    return (np.asarray(irs, dtype=float)[..., BIG_DODGE_SENSORS] > big).any(axis=-1)
+
+
+def obstacle_dodge(irs, dodge):
+    return (np.asarray(irs, dtype=float)[..., DODGE_SENSORS] > dodge).any(axis=-1)
+
+
+def decide(irs, thresholds):
+    """Every task0_group_6 branch for readings ``irs`` of shape (8,) or (N, 8).
+
+    Missing readings (None or nan) never trigger anything.
+    """
+    irs = np.asarray(irs, dtype=float)
+    dodge, big, back_c = thresholds
+    wall = big_dodge(irs, big)
+    obstacle = ~wall & obstacle_dodge(irs, dodge)
+    forward = ~wall & ~obstacle
+    # FrontRR above the active dodge's threshold turns left, anything else turns right
+    turn_left = np.where(wall, irs[..., 5] > np.asarray(big)[..., 1], irs[..., 5] > np.asarray(dodge)[..., 1])
+    return Decision(
+        wall_dodge=wall,
+        obstacle_dodge=obstacle,
+        forward=forward,
+        clear_space=forward & (irs[..., 4] < CLEAR_SPACE),
+        turn_left=turn_left & ~forward,
+        back_blocked=irs[..., 6] > back_c,
+        back_left=irs[..., 0] > BACK_SIDE,
+        back_right=irs[..., 1] > BACK_SIDE,
+    )
@@ -0,0 +1,176 @@
+"""Seeded sensor noise, dropped or stale IR reads and latencies for LocalRobobo.
+
+The clean local simulator never shows what the hardware does: noisy IR
+values, a sensor that misses an update, a read_irs that returns the
+previous reply, and motion commands that reach the wheels late. That
+lag is the reason task0_group_6 stops the robot at step 1. A Disturbance
+describes all of these, and LocalRobobo applies it from its own seeded
+generator, so a disturbed episode is reproducible:
+
+    rob = LocalRobobo(disturbance=HARDWARE_LIKE, seed=7)
+
+Latencies are shifted exponentials, ``minimum + Exp(mean_extra)``, on the
+virtual clock. A read's reply arrives ``read_latency`` after the
+sensors were sampled, while the robot keeps moving. A move takes effect
+``command_latency`` after it was sent, and until then the previous
+command keeps driving.
+
+stress_test runs many randomized episodes, each with its own start pose
+and seed, in parallel processes. It reports collisions, dodges and how
+long a control step took on the virtual clock against a period budget:
+
+    python -m learning_machines.disturbances --episodes 2000 --preset hardware_like --budget 1.0
+"""
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+
+import numpy as np
+
+from .batch_sim import random_starts
+from .config import SIMULATION, ControllerConfig
+from .events import EventLog
+from .local_sim import LocalRobobo
+from .task0_g6 import task0_group_6
+
+
+@dataclass(frozen=True)
+class Disturbance:
+    noise_std: float = 0.0              # Gaussian IR noise, absolute
+    noise_rel: float = 0.0              # plus this fraction of the reading
+    dropout: float = 0.0                # per sensor and read: chance the sensor repeats its last value
+    stale: float = 0.0                  # per read: chance read_irs returns the previous reply unchanged
+    read_latency: tuple = (0.0, 0.0)    # (minimum, mean extra) seconds
+    command_latency: tuple = (0.0, 0.0)
+
+    def disturb(self, irs, previous, rng):
+        """A disturbed copy of the (8,) readings ``irs``, given the previous reply (or None)."""
+        if previous is not None and self.stale and rng.random() < self.stale:
+            return previous
+        irs = np.asarray(irs, dtype=float)
+        if self.noise_std or self.noise_rel:
+            irs = np.maximum(irs + rng.standard_normal(irs.shape) * (self.noise_std + self.noise_rel * irs), 0.0)
+        if previous is not None and self.dropout:
+            irs = np.where(rng.random(irs.shape) < self.dropout, previous, irs)
+        return irs
+
+    def read_delay(self, rng):
+        return _delay(self.read_latency, rng)
+
+    def command_delay(self, rng):
+        return _delay(self.command_latency, rng)
+
+
+def _delay(latency, rng):
+    minimum, mean_extra = latency
+    return minimum + (rng.exponential(mean_extra) if mean_extra else 0.0)
+
+
+CLEAN = Disturbance()
+
+# Rough figures for the physical Robobo over WiFi
+HARDWARE_LIKE = Disturbance(
+    noise_std=0.5,
+    noise_rel=0.05,
+    dropout=0.02,
+    stale=0.05,
+    read_latency=(0.02, 0.03),
+    command_latency=(0.03, 0.05),
+)
+
+PRESETS = {'clean': CLEAN, 'hardware_like': HARDWARE_LIKE}
+
+
+class _StepTimes:
+    """Recorder stand-in that keeps only the step timestamps."""
+
+    def __init__(self):
+        self.timestamps = []
+
+    def record(self, step, irs, wall_dodge, obstacle_dodge, action, timestamp):
+        self.timestamps.append(timestamp)
+
+    def record_dodge(self, step, kind, irs):
+        pass
+
+
+def run_episode(index, config, disturbance, steps, start, seed):
+    """One disturbed task0_group_6 episode on LocalRobobo; a dict of its outcome."""
+    rob = LocalRobobo(config.arena, start=start, disturbance=disturbance, seed=(seed, index))
+    times = _StepTimes()
+    with EventLog(console_level=None):
+        _, metadata = task0_group_6(rob, steps=steps, recorder=times, config=config)
+    periods = np.diff(times.timestamps)
+    return {
+        'episode': index,
+        'seed': [seed, index],
+        **rob.last_episode,
+        'obstacle_dodges': metadata['obstacle_dodges'],
+        'wall_dodges': metadata['wall_dodges'],
+        'preemptions': metadata['preemptions'],
+        'steps': metadata['total_steps'],
+        'periods': periods.tolist(),
+    }
+
+
+def stress_test(disturbance=HARDWARE_LIKE, episodes=1000, steps=100, config=SIMULATION, workers=None,
+                seed=0, budget=None, chunksize=8):
+    """Run ``episodes`` disturbed episodes from random start poses in parallel and summarize them.
+
+    Episode i uses start pose i of random_starts(config.arena, episodes, seed)
+    and generator seed (seed, i), so results do not depend on the number of
+    workers. With a ``budget`` (seconds), steps whose virtual-clock period
+    exceeds it are counted as overruns.
+    """
+    starts = random_starts(config.arena, episodes, seed)
+    args = [(i, config, disturbance, steps, tuple(starts[i]), seed) for i in range(episodes)]
+    workers = min(workers or os.cpu_count() or 1, episodes)
+    if workers == 1:
+        results = [run_episode(*arg) for arg in args]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(run_episode, *zip(*args), chunksize=chunksize))
+    return summarize(results, budget), results
+
+
+def summarize(results, budget=None):
+    collisions = np.array([result['collisions'] for result in results])
+    periods = np.concatenate([result['periods'] for result in results] or [np.zeros(0)])
+    summary = {
+        'episodes': len(results),
+        'collisions': float(collisions.mean()),
+        'collision_free': float((collisions == 0).mean()),
+        'distance': float(np.mean([result['distance'] for result in results])),
+        'obstacle_dodges': float(np.mean([result['obstacle_dodges'] for result in results])),
+        'wall_dodges': float(np.mean([result['wall_dodges'] for result in results])),
+        'period_p50': float(np.percentile(periods, 50)) if periods.size else None,
+        'period_p99': float(np.percentile(periods, 99)) if periods.size else None,
+        'period_max': float(periods.max()) if periods.size else None,
+    }
+    if budget is not None:
+        summary['budget'] = budget
+        summary['overruns'] = float((periods > budget).mean()) if periods.size else 0.0
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stress-test task0_group_6 under sensor noise and latency")
+    parser.add_argument('--preset', default='hardware_like', choices=sorted(PRESETS))
+    parser.add_argument('--disturbance', help="JSON of Disturbance fields, applied over the preset")
+    parser.add_argument('--config', help="ControllerConfig JSON (default: SIMULATION)")
+    parser.add_argument('--episodes', type=int, default=1000)
+    parser.add_argument('--steps', type=int, default=100)
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--budget', type=float, help="step period budget in seconds")
+    args = parser.parse_args()
+    disturbance = PRESETS[args.preset]
+    if args.disturbance:
+        fields = {key: tuple(value) if isinstance(value, list) else value
+                  for key, value in json.loads(args.disturbance).items()}
+        disturbance = Disturbance(**{**asdict(disturbance), **fields})
+    config = ControllerConfig.from_file(args.config) if args.config else SIMULATION
+    summary, _ = stress_test(disturbance, args.episodes, args.steps, config, args.workers, args.seed, args.budget)
+    print(json.dumps({'disturbance': asdict(disturbance), **summary}, indent=2))
@@ -0,0 +1,117 @@
+"""Compact binary episode files (.rbep) readable with np.memmap.
+
+Layout: an 8-byte magic, a little-endian uint32 header length, a JSON
+header (record dtype, record count, action names, run metadata) padded
+so the records start on a 64-byte boundary, then the packed records.
+load_episode maps the records instead of reading them, so slicing a
+column across hundreds of runs touches only the bytes it needs.
+"""
+import csv
+import json
+import struct
+from pathlib import Path
+
+import numpy as np
+
+from .local_sim import IR_NAMES
+
+MAGIC = b'RBEPISD1'
+EXTENSION = '.rbep'
+ALIGN = 64
+
+# Action codes stored per step; index 0 means no action recorded
+ACTIONS = ['', 'wall_dodge', 'obstacle_dodge', 'clear_space', 'forward']
+
+STEP_DTYPE = np.dtype([
+    ('step', '<u4'),
+    ('irs', '<f4', (len(IR_NAMES),)),
+    ('wall_dodge', 'u1'),
+    ('obstacle_dodge', 'u1'),
+    ('action', 'u1'),
+    ('timestamp', '<f8'),
+])
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return str(value)
+
+
+def save_episode(filename, records, metadata=None):
+    """Write a STEP_DTYPE array and its run metadata to ``filename``."""
+    records = np.asarray(records, dtype=STEP_DTYPE)
+    header = {
+        'version': 1,
+        'dtype': STEP_DTYPE.descr,
+        'count': len(records),
+        'actions': ACTIONS,
+        'metadata': metadata or {},
+    }
+    encoded = json.dumps(header, default=_json_default).encode('utf-8')
+    prefix = len(MAGIC) + 4
+    encoded += b' ' * (-(prefix + len(encoded)) % ALIGN)
+    with open(filename, 'wb') as file:
+        file.write(MAGIC)
+        file.write(struct.pack('<I', len(encoded)))
+        file.write(encoded)
+        file.write(records.tobytes())
+
+
+def read_header(filename):
+    """The JSON header of an episode file and the byte offset of its records."""
+    with open(filename, 'rb') as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{filename} is not an episode file")
+        (length,) = struct.unpack('<I', file.read(4))
+        header = json.loads(file.read(length))
+    return header, len(MAGIC) + 4 + length
+
+
+def load_episode(filename, mmap=True):
+    """(header, records) of an episode file; records are memory-mapped by default."""
+    header, offset = read_header(filename)
+    if header['count'] == 0:
+        return header, np.zeros(0, dtype=STEP_DTYPE)
+    if mmap:
+        records = np.memmap(filename, dtype=STEP_DTYPE, mode='r', offset=offset, shape=(header['count'],))
+    else:
+        records = np.fromfile(filename, dtype=STEP_DTYPE, count=header['count'], offset=offset)
+    return header, records
+
+
+def find_episodes(root):
+    """Every episode file below ``root``, in a stable order."""
+    return sorted(Path(root).rglob(f"*{EXTENSION}"))
+
+
+def records_from_stream(stream_filename):
+    """Convert an EpisodeRecorder stream into a STEP_DTYPE array."""
+    codes = {name: code for code, name in enumerate(ACTIONS)}
+    with open(stream_filename, newline='') as csvfile:
+        rows = list(csv.DictReader(csvfile))
+    records = np.zeros(len(rows), dtype=STEP_DTYPE)
+    for i, row in enumerate(rows):
+        records[i] = (
+            int(row['Step']),
+            [float(row[name] or 'nan') for name in IR_NAMES],
+            int(row['WallDodge']),
+            int(row['ObstacleDodge']),
+            codes.get(row['Action'], 0),
+            float(row['Timestamp'] or 'nan'),
+        )
+    return records
+
+
+def records_from_sensor_readings(sensor_readings):
+    """Convert save_to_csv style rows (8 IR values + 2 flags) into a STEP_DTYPE array."""
+    readings = np.asarray(sensor_readings, dtype=float).reshape(-1, len(IR_NAMES) + 2)
+    records = np.zeros(len(readings), dtype=STEP_DTYPE)
+    records['step'] = np.arange(len(readings))
+    records['irs'] = readings[:, :len(IR_NAMES)]
+    records['wall_dodge'] = readings[:, len(IR_NAMES)]
+    records['obstacle_dodge'] = readings[:, len(IR_NAMES) + 1]
+    records['timestamp'] = np.nan
+    return records
@@ -0,0 +1,169 @@
+"""Structured events from the control loop, written off the control thread.
+
+task0_group_6 used to print every step and dump all 8 IR values on
+every dodge; over a slow terminal or SSH session that stdout I/O held up
+the loop. It now emits named events (EVENTS) on the ``learning_machines``
+logger, with the values as fields:
+
+    emit(log, 'wall_dodge', step=step, wall_dodges=wall_dodges, irs=irs)
+
+While an EventLog is open, the loop only puts each record on a queue. A
+listener thread writes every event as a JSON line to the episode's
+events file, and prints a rate-limited, one-line version of the INFO and
+higher ones to the console, so the loop no longer waits on the console.
+
+    with EventLog(grouped_data_dir / "events.jsonl"):
+        task0_group_6(rob)
+
+Without an EventLog the events go through normal logging configuration.
+"""
+import json
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+LOGGER_NAME = 'learning_machines'
+
+# name -> (level, console message); the message is %-formatted with the event's fields
+EVENTS = {
+    'step': (logging.DEBUG, "Step: %(step)d"),
+    'settle': (logging.DEBUG, "Settled after first step: %(irs)s"),
+    'read_error': (logging.ERROR, "Error reading IR sensors: %(error)s"),
+    'consecutive_obstacle_dodges': (logging.WARNING, "Too many consecutive obstacle dodges"),
+    'consecutive_wall_dodges': (logging.WARNING, "Too many consecutive big dodges"),
+    'wall_dodge': (logging.INFO, "Big Dodge at step %(step)d (%(wall_dodges)d so far): %(irs)s"),
+    'obstacle_dodge': (logging.INFO, "Obstacle Dodge at step %(step)d: %(irs)s"),
+    'clear_space': (logging.DEBUG, "Clear space ahead"),
+    'preempted': (logging.INFO, "Maneuver preempted at step %(step)d"),
+    'episode_end': (logging.INFO, "Done, steps episode: %(total_steps)d"),
+}
+
+# Console rate limits as (events per second, burst); other events are not limited
+RATE_LIMITS = {
+    'obstacle_dodge': (2.0, 5),
+    'wall_dodge': (2.0, 5),
+    'preempted': (1.0, 3),
+    'consecutive_obstacle_dodges': (1.0, 3),
+    'consecutive_wall_dodges': (1.0, 3),
+}
+
+
+def emit(logger, name, **fields):
+    """Log event ``name`` with ``fields``; a no-op when its level is disabled."""
+    level, message = EVENTS[name]
+    if logger.isEnabledFor(level):
+        # A single dict argument becomes record.args, formatting the message by field name
+        logger.log(level, message, *([fields] if fields else []), extra={'event': name})
+
+
+class RateLimitFilter(logging.Filter):
+    """Token bucket per event name; counts what it drops and reports it on the next record it passes."""
+
+    def __init__(self, limits=RATE_LIMITS):
+        super().__init__()
+        self.limits = limits
+        self._buckets = {}
+        self._suppressed = {}
+
+    def filter(self, record):
+        name = getattr(record, 'event', None)
+        if name not in self.limits:
+            return True
+        rate, burst = self.limits[name]
+        tokens, last = self._buckets.get(name, (burst, record.created))
+        tokens = min(burst, tokens + (record.created - last) * rate)
+        if tokens < 1:
+            self._buckets[name] = (tokens, record.created)
+            self._suppressed[name] = self._suppressed.get(name, 0) + 1
+            return False
+        self._buckets[name] = (tokens - 1, record.created)
+        record.suppressed = self._suppressed.pop(name, 0)
+        return True
+
+
+class ConsoleFormatter(logging.Formatter):
+    def format(self, record):
+        message = super().format(record)
+        suppressed = getattr(record, 'suppressed', 0)
+        return f"{message} (+{suppressed} suppressed)" if suppressed else message
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, event, message and the event's fields."""
+
+    def format(self, record):
+        entry = {
+            'time': record.created,
+            'level': record.levelname,
+            'event': getattr(record, 'event', None),
+            'message': record.getMessage(),
+        }
+        if isinstance(record.args, dict):
+            entry.update(record.args)
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _EventQueueHandler(QueueHandler):
+    # QueueHandler.prepare formats the message on the calling thread; leave that to the listener
+    def prepare(self, record):
+        return record
+
+
+class EventLog:
+    """Routes the package's log records through a queue to a JSON lines file and a rate-limited console."""
+
+    def __init__(self, filename=None, console_level=logging.INFO, file_level=logging.DEBUG, limits=RATE_LIMITS):
+        handlers = []
+        if filename is not None:
+            file_handler = logging.FileHandler(filename, mode='w')
+            file_handler.setLevel(file_level)
+            file_handler.setFormatter(JsonFormatter())
+            handlers.append(file_handler)
+        if console_level is not None:
+            console = logging.StreamHandler()
+            console.setLevel(console_level)
+            console.setFormatter(ConsoleFormatter("%(message)s"))
+            console.addFilter(RateLimitFilter(limits))
+            handlers.append(console)
+        self.handlers = handlers
+        self.level = min(handler.level for handler in handlers) if handlers else logging.CRITICAL
+        self._queue = queue.SimpleQueue()
+        self._handler = _EventQueueHandler(self._queue)
+        self._listener = QueueListener(self._queue, *handlers, respect_handler_level=True)
+        self._saved = None
+
+    def open(self):
+        logger = logging.getLogger(LOGGER_NAME)
+        self._saved = logger.level, logger.propagate
+        logger.setLevel(self.level)
+        logger.propagate = False
+        logger.addHandler(self._handler)
+        self._listener.start()
+        return self
+
+    def close(self):
+        """Detach from the logger and block until every queued record is written."""
+        if self._saved is None:
+            return
+        logger = logging.getLogger(LOGGER_NAME)
+        logger.removeHandler(self._handler)
+        level, logger.propagate = self._saved
+        logger.setLevel(level)
+        self._saved = None
+        self._listener.stop()
+        for handler in self.handlers:
+            handler.close()
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_events(filename):
+    """The events of a JSON lines events file as dicts."""
+    with open(filename) as file:
+        return [json.loads(line) for line in file if line.strip()]
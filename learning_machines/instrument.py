@@ -0,0 +1,146 @@
+"""Per-call latency instrumentation for a robot.
+
+InstrumentedRobobo wraps an IRobobo and times every method call on it
+with ``time.perf_counter``, grouped by method name, so an episode shows
+how long IR round-trips, motion commands and sleeps really take. When
+the controller marks its steps (task0_group_6 does), it also records
+the wall-clock period of each step and the part of it spent outside
+robot calls: decisions, event logging (see events) and recording.
+
+    rob = InstrumentedRobobo(rob)
+    task0_group_6(rob, steps=100)
+    print(rob.summary()['read_irs'])
+    rob.save(grouped_data_dir / "timings.json")
+
+run_episode wraps the robot when ``config.timed`` is set. The timings
+of several runs, say from hardware and from the simulator, can be
+compared with
+
+    python -m learning_machines.instrument grouped_data/runs5_*_hard grouped_data/runs5_*_sim
+"""
+import functools
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+PERCENTILES = [50, 90, 99]
+# Histogram bins: 4 per decade from 1 µs to 100 s
+HISTOGRAM_EDGES = np.logspace(-6, 2, 33)
+
+STEP = 'step'              # wall-clock period of a controller step
+CONTROLLER = 'controller'  # part of a step spent outside robot calls
+TIMINGS_FILE = 'timings.json'
+
+
+def unwrap(rob):
+    """The robot underneath any InstrumentedRobobo wrappers."""
+    while isinstance(rob, InstrumentedRobobo):
+        rob = rob.rob
+    return rob
+
+
+def summarize(durations):
+    """count, total, mean, max and percentiles of a list of durations, in milliseconds."""
+    values = np.asarray(durations, dtype=float) * 1000
+    if values.size == 0:
+        return {'count': 0}
+    summary = {
+        'count': int(values.size),
+        'total_ms': float(values.sum()),
+        'mean_ms': float(values.mean()),
+        'max_ms': float(values.max()),
+    }
+    for percentile, value in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+        summary[f"p{percentile}_ms"] = float(value)
+    return summary
+
+
+def histogram(durations):
+    """Counts of ``durations`` (seconds) in the HISTOGRAM_EDGES bins; out-of-range values go to the end bins."""
+    values = np.clip(np.asarray(durations, dtype=float), HISTOGRAM_EDGES[0], HISTOGRAM_EDGES[-1])
+    return np.histogram(values, HISTOGRAM_EDGES)[0].tolist()
+
+
+class InstrumentedRobobo:
+    """Delegates to ``rob``, timing each method call under the method's name."""
+
+    def __init__(self, rob, clock=time.perf_counter):
+        self.rob = rob
+        self.clock = clock
+        self.durations = {}
+        self._step_start = None
+        self._in_calls = 0.0
+
+    def __getattr__(self, name):
+        attr = getattr(self.rob, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+        durations = self.durations.setdefault(name, [])
+
+        @functools.wraps(attr)
+        def timed(*args, **kwargs):
+            start = self.clock()
+            try:
+                return attr(*args, **kwargs)
+            finally:
+                elapsed = self.clock() - start
+                durations.append(elapsed)
+                self._in_calls += elapsed
+
+        # Cache the wrapper so later calls skip __getattr__
+        setattr(self, name, timed)
+        return timed
+
+    def mark_step(self):
+        """End the current controller step, if any, and start the next one."""
+        now = self.clock()
+        if self._step_start is not None:
+            period = now - self._step_start
+            self.durations.setdefault(STEP, []).append(period)
+            self.durations.setdefault(CONTROLLER, []).append(period - self._in_calls)
+        self._step_start = now
+        self._in_calls = 0.0
+
+    def summary(self):
+        """summarize() of every call type and of the steps."""
+        return {name: summarize(durations) for name, durations in self.durations.items() if durations}
+
+    def save(self, filename):
+        """Write the summary, histograms and raw durations (seconds) as JSON."""
+        timings = {
+            'summary': self.summary(),
+            'histogram_edges': HISTOGRAM_EDGES.tolist(),
+            'histograms': {name: histogram(durations) for name, durations in self.durations.items() if durations},
+            'durations': {name: durations for name, durations in self.durations.items() if durations},
+        }
+        with open(filename, 'w') as file:
+            json.dump(timings, file)
+
+
+def load_timings(path):
+    """Raw durations per call type of a timings file, or of every timings file below a directory, pooled."""
+    path = Path(path)
+    files = [path] if path.is_file() else sorted(path.rglob(TIMINGS_FILE))
+    durations = {}
+    for filename in files:
+        with open(filename) as file:
+            for name, values in json.load(file)['durations'].items():
+                durations.setdefault(name, []).extend(values)
+    return durations
+
+
+def print_table(label, durations):
+    print(label)
+    print(f"  {'call':<16}{'count':>8}{'mean':>10}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}  (ms)")
+    for name, values in sorted(durations.items()):
+        s = summarize(values)
+        print(f"  {name:<16}{s['count']:>8}{s['mean_ms']:>10.3f}{s['p50_ms']:>10.3f}"
+              f"{s['p90_ms']:>10.3f}{s['p99_ms']:>10.3f}{s['max_ms']:>10.3f}")
+
+
+if __name__ == "__main__":
+    for path in sys.argv[1:]:
+        print_table(path, load_timings(path))
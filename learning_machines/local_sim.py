@@ -0,0 +1,396 @@
+"""Headless 2D stand-in for SimulationRobobo.
+
+Implements the IRobobo surface used by the tasks on top of a kinematic
+differential-drive model and a virtual clock: ``rob.sleep(s)`` advances
+simulated time by ``s`` instead of blocking, so whole episodes run in
+milliseconds.
+
+    rob = LocalRobobo(arena="similar_to_irl_gp")
+    run_all_actions(rob)
+"""
+import math
+
+import numpy as np
+
+from robobo_interface import IRobobo
+from robobo_interface.datatypes import (
+    Acceleration,
+    Orientation,
+    Position,
+    WheelPosition,
+)
+
+# Index order of read_irs(), same as the columns written by save_to_csv
+IR_NAMES = ['BackL', 'BackR', 'FrontL', 'FrontR', 'FrontC', 'FrontRR', 'BackC', 'FrontLL']
+
+# Mounting angle of each IR sensor, counter-clockwise from the heading
+IR_ANGLES = np.radians([155, -155, 45, -45, 0, -20, 180, 20])
+
+# Each sensor sees a cone, sampled by a fan of rays; the nearest hit wins
+IR_CONE = np.radians([-15, 0, 15])
+
+IR_RANGE = 0.2    # metres from the robot body
+IR_FLOOR = 5.8    # reading with nothing in range (sim median is ~5.85)
+IR_GAIN = 0.4     # reading = IR_FLOOR + IR_GAIN * (1/d^2 - 1/IR_RANGE^2)
+IR_MAX = 2000.0
+
+ROBOT_RADIUS = 0.07
+WHEEL_BASE = 0.1
+WHEEL_RADIUS = 0.03
+WHEEL_SPEED_SCALE = 0.003   # m/s per unit of move() speed
+COLLISION_STEP = 0.005      # max distance between collision checks (m)
+
+
+def _box(cx, cy, w, h):
+    x0, x1, y0, y1 = cx - w / 2, cx + w / 2, cy - h / 2, cy + h / 2
+    return [(x0, y0, x1, y0), (x1, y0, x1, y1), (x1, y1, x0, y1), (x0, y1, x0, y0)]
+
+
+# Wall segments (x1, y1, x2, y2) and start pose (x, y, heading) per arena
+ARENAS = {
+    'empty': {
+        'walls': _box(0.0, 0.0, 2.0, 2.0),
+        'start': (0.0, 0.0, 0.0),
+    },
+    'similar_to_irl_gp': {
+        'walls': (
+            _box(0.0, 0.0, 2.4, 1.8)
+            + _box(0.5, 0.3, 0.25, 0.25)
+            + _box(-0.45, -0.35, 0.3, 0.2)
+            + _box(-0.3, 0.5, 0.2, 0.2)
+            + _box(0.7, -0.5, 0.15, 0.35)
+        ),
+        'start': (-0.8, 0.0, 0.0),
+    },
+}
+
+
+def cast_rays(origins, directions, walls, max_range=IR_RANGE):
+    """Distance along each ray to the nearest wall, capped at ``max_range``.
+
+    ``origins`` and ``directions`` have shape (..., 2) and ``walls``
+    (..., M, 4), broadcasting against the rays; the result has the leading
+    shape of the rays.
+    """
+    ex = walls[..., 2] - walls[..., 0]
+    ey = walls[..., 3] - walls[..., 1]
+    dx = directions[..., 0, None]
+    dy = directions[..., 1, None]
+    px = walls[..., 0] - origins[..., 0, None]
+    py = walls[..., 1] - origins[..., 1, None]
+    denom = dx * ey - dy * ex
+    with np.errstate(divide='ignore', invalid='ignore'):
+        inv = 1.0 / denom
+        t = (px * ey - py * ex) * inv
+        u = (px * dy - py * dx) * inv
+    hit = (t >= 0) & (u >= 0) & (u <= 1)
+    return np.minimum(np.where(hit, t, np.inf).min(axis=-1), max_range)
+
+
+def _squared_wall_distances(points, walls):
+    ex = walls[..., 2] - walls[..., 0]
+    ey = walls[..., 3] - walls[..., 1]
+    rx = points[..., 0, None] - walls[..., 0]
+    ry = points[..., 1, None] - walls[..., 1]
+    u = np.clip((rx * ex + ry * ey) * (1.0 / (ex * ex + ey * ey)), 0.0, 1.0)
+    rx -= u * ex
+    ry -= u * ey
+    return rx * rx + ry * ry
+
+
+def wall_distances(points, walls):
+    """Distance from each point (..., 2) to the nearest wall segment.
+
+    ``walls`` is (M, 4) or (..., M, 4) broadcasting against the points.
+    """
+    return np.sqrt(_squared_wall_distances(points, walls).min(axis=-1))
+
+
+# Padding for nearby_walls, too far away to ever be seen or touched
+_FAR_WALL = np.array([1e6, 1e6, 1e6 + 1, 1e6])
+
+
+def nearby_walls(x, y, walls, reach):
+    """The walls within ``reach`` of each of k points, as (k, m, 4).
+
+    Rows are padded with a far-away wall up to the largest count, so
+    queries against the result match queries against every wall while
+    touching only the few segments near each robot.
+    """
+    points = np.stack([x, y], axis=-1)
+    near = _squared_wall_distances(points, walls) < np.square(reach)[..., None]
+    m = max(int(near.sum(axis=1).max(initial=0)), 1)
+    order = np.argsort(~near, axis=1, kind='stable')[:, :m]
+    keep = np.take_along_axis(near, order, axis=1)
+    return np.where(keep[..., None], walls[order], _FAR_WALL)
+
+
+def ir_from_distance(distance):
+    """Map distances from the robot body to IR readings."""
+    d = np.maximum(distance, 1e-3)
+    value = IR_FLOOR + IR_GAIN * (1.0 / d ** 2 - 1.0 / IR_RANGE ** 2)
+    return np.where(distance >= IR_RANGE, IR_FLOOR, np.minimum(value, IR_MAX))
+
+
+def ir_readings(x, y, heading, walls):
+    """IR readings (k, 8) of k robots with poses given as (k,) arrays."""
+    mounts = heading[:, None] + IR_ANGLES
+    angles = mounts[..., None] + IR_CONE
+    directions = np.stack([np.cos(angles), np.sin(angles)], axis=-1)
+    origins = np.stack([
+        x[:, None] + ROBOT_RADIUS * np.cos(mounts),
+        y[:, None] + ROBOT_RADIUS * np.sin(mounts),
+    ], axis=-1)
+    local = nearby_walls(x, y, walls, np.full(x.shape, ROBOT_RADIUS + IR_RANGE))
+    distances = cast_rays(origins[..., None, :], directions, local[:, None, None]).min(axis=-1)
+    return ir_from_distance(distances)
+
+
+def integrate_arcs(x, y, heading, left_speed, right_speed, duration, walls):
+    """Drive k robots at constant wheel speeds for ``duration`` seconds each.
+
+    Motion follows the exact differential-drive arc. A robot that would
+    touch a wall stops at the last collision-free point of its path but
+    keeps turning. Returns the new (x, y, heading), a hit flag and the
+    distance travelled, all as (k,) arrays.
+    """
+    vl = left_speed * WHEEL_SPEED_SCALE
+    vr = right_speed * WHEEL_SPEED_SCALE
+    v = (vl + vr) / 2
+    w = (vr - vl) / WHEEL_BASE
+    new_heading = (heading + w * duration) % (2 * math.pi)
+    path = np.abs(v) * duration
+
+    # Only robots whose path can reach a wall need their arc sampled
+    near = path > 0
+    near[near] = wall_distances(np.stack([x[near], y[near]], axis=-1), walls) < path[near] + ROBOT_RADIUS
+    new_x = x.copy()
+    new_y = y.copy()
+    hit = np.zeros(x.shape, dtype=bool)
+    travelled = path.copy()
+    far = ~near
+    turning = np.abs(w) > 1e-9
+    safe_w = np.where(turning, w, 1.0)
+    straight = far & ~turning
+    arc = far & turning
+    new_x[straight] += path[straight] * np.sign(v[straight]) * np.cos(heading[straight])
+    new_y[straight] += path[straight] * np.sign(v[straight]) * np.sin(heading[straight])
+    r = v[arc] / safe_w[arc]
+    new_x[arc] += r * (np.sin(heading[arc] + w[arc] * duration[arc]) - np.sin(heading[arc]))
+    new_y[arc] -= r * (np.cos(heading[arc] + w[arc] * duration[arc]) - np.cos(heading[arc]))
+
+    if near.any():
+        idx = np.flatnonzero(near)
+        samples = max(2, math.ceil(path[idx].max() / COLLISION_STEP) + 1)
+        t = duration[idx, None] * np.linspace(0.0, 1.0, samples)
+        h0 = heading[idx, None]
+        theta = h0 + w[idx, None] * t
+        r = (v[idx] / safe_w[idx])[:, None]
+        vt = v[idx, None] * t
+        xs = x[idx, None] + np.where(turning[idx, None], r * (np.sin(theta) - np.sin(h0)), vt * np.cos(h0))
+        ys = y[idx, None] + np.where(turning[idx, None], -r * (np.cos(theta) - np.cos(h0)), vt * np.sin(h0))
+        local = nearby_walls(x[idx], y[idx], walls, path[idx] + ROBOT_RADIUS)
+        blocked = wall_distances(np.stack([xs, ys], axis=-1), local[:, None]) < ROBOT_RADIUS
+        hit[idx] = blocked.any(axis=1)
+        last = np.where(hit[idx], blocked.argmax(axis=1), samples) - 1
+        moved = last >= 0
+        rows = np.arange(idx.size)
+        new_x[idx] = np.where(moved, xs[rows, last], x[idx])
+        new_y[idx] = np.where(moved, ys[rows, last], y[idx])
+        travelled[idx] = np.where(moved, np.abs(v[idx]) * t[rows, last], 0.0)
+    return new_x, new_y, new_heading, hit, travelled
+
+
+class LocalRobobo(IRobobo):
+    """In-process Robobo with a virtual clock, for fast headless episodes."""
+
+    def __init__(self, arena="similar_to_irl_gp", start=None, sensor_model=None, disturbance=None, seed=None):
+        self.arena = arena
+        self.sensor_model = sensor_model  # maps (k, 8) readings, e.g. a calibration.IRSensorModel
+        self.disturbance = disturbance    # noise, dropouts and latencies, see disturbances.Disturbance
+        self.rng = np.random.default_rng(seed)
+        self.last_episode = None
+        self.walls = np.asarray(ARENAS[arena]['walls'], dtype=float)
+        self.start = tuple(start) if start is not None else ARENAS[arena]['start']
+        self._running = False
+        self._blockid = 0
+        self._pan = 180
+        self._tilt = 90
+        self._reset()
+
+    def _reset(self):
+        self.x, self.y, self.heading = self.start
+        self._time = 0.0
+        self._command = (0.0, 0.0)
+        self._command_until = 0.0
+        self._pending = []    # (start, command, until) of moves still in flight
+        self._last_irs = None
+        self._wheel_pos = [0.0, 0.0]
+        self._in_contact = False
+        self.collisions = 0
+        self.distance = 0.0
+
+    # Simulation control
+
+    def play_simulation(self):
+        self._running = True
+
+    def pause_simulation(self):
+        self._running = False
+
+    def stop_simulation(self):
+        self._running = False
+        self.last_episode = {'collisions': self.collisions, 'distance': self.distance, 'sim_time': self._time}
+        self._reset()
+
+    def reseed(self, seed):
+        self.rng = np.random.default_rng(seed)
+
+    def place(self, start):
+        """Start the next episode from ``start`` (x, y, heading)."""
+        self.start = tuple(start)
+        self._reset()
+
+    def is_running(self):
+        return self._running
+
+    def is_stopped(self):
+        return not self._running
+
+    def get_sim_time(self):
+        return self._time
+
+    def get_position(self):
+        return Position(x=self.x, y=self.y, z=0.0)
+
+    def set_position(self, position, orientation):
+        self.x, self.y = position.x, position.y
+        self.heading = math.radians(orientation.yaw)
+
+    # Motion
+
+    def move(self, left_speed, right_speed, millis, blockid=None):
+        command = (float(left_speed), float(right_speed))
+        latency = self.disturbance.command_delay(self.rng) if self.disturbance is not None else 0.0
+        if latency > 0 or self._pending:
+            # Commands reach the wheels in the order they were sent
+            start = max(self._time + latency, self._pending[-1][0] if self._pending else 0.0)
+            self._pending.append((start, command, start + millis / 1000))
+        else:
+            self._command = command
+            self._command_until = self._time + millis / 1000
+        self._blockid += 1
+        return self._blockid
+
+    def _busy_until(self):
+        return self._pending[-1][2] if self._pending else self._command_until
+
+    def move_blocking(self, left_speed, right_speed, millis):
+        blockid = self.move(left_speed, right_speed, millis)
+        self._advance(self._busy_until() - self._time)
+        return blockid
+
+    def is_blocked(self, blockid):
+        return blockid == self._blockid and self._time < self._busy_until()
+
+    def block(self):
+        self._advance(self._busy_until() - self._time)
+
+    def sleep(self, seconds):
+        self._advance(seconds)
+
+    def reset_wheels(self):
+        self._wheel_pos = [0.0, 0.0]
+
+    def read_wheels(self):
+        left, right = self._command if self._time < self._command_until else (0.0, 0.0)
+        return WheelPosition(
+            wheel_pos_l=int(self._wheel_pos[0]),
+            wheel_pos_r=int(self._wheel_pos[1]),
+            wheel_speed_l=int(left),
+            wheel_speed_r=int(right),
+        )
+
+    def _advance(self, seconds):
+        end = self._time + max(seconds, 0.0)
+        while self._time < end:
+            if self._pending and self._pending[0][0] <= self._time:
+                _, self._command, self._command_until = self._pending.pop(0)
+                continue
+            stop = min(end, self._pending[0][0]) if self._pending else end
+            if self._time < self._command_until:
+                until = min(stop, self._command_until)
+                self._drive(*self._command, until - self._time)
+                self._time = until
+            else:
+                self._time = stop
+
+    def _drive(self, left_speed, right_speed, duration):
+        if not self._running or duration <= 0:
+            return
+        x, y, heading, hit, travelled = integrate_arcs(
+            np.array([self.x]), np.array([self.y]), np.array([self.heading]),
+            np.array([left_speed]), np.array([right_speed]), np.array([duration]),
+            self.walls,
+        )
+        if hit[0] and not self._in_contact:
+            self.collisions += 1
+        self._in_contact = bool(hit[0])
+        self.x, self.y, self.heading = float(x[0]), float(y[0]), float(heading[0])
+        self.distance += float(travelled[0])
+        travel = math.degrees(duration / WHEEL_RADIUS) * WHEEL_SPEED_SCALE
+        self._wheel_pos[0] += left_speed * travel
+        self._wheel_pos[1] += right_speed * travel
+
+    # Sensors
+
+    def read_irs(self):
+        readings = ir_readings(np.array([self.x]), np.array([self.y]), np.array([self.heading]), self.walls)
+        if self.sensor_model is not None:
+            readings = self.sensor_model(readings)
+        if self.disturbance is None:
+            return readings[0].tolist()
+        irs = self.disturbance.disturb(readings[0], self._last_irs, self.rng)
+        self._last_irs = irs
+        # The reply arrives after the round-trip, with the robot still moving
+        self._advance(self.disturbance.read_delay(self.rng))
+        return irs.tolist()
+
+    def get_image_front(self):
+        return np.zeros((480, 640, 3), dtype=np.uint8)
+
+    def read_accel(self):
+        return Acceleration(x=0.0, y=0.0, z=9.81)
+
+    def read_orientation(self):
+        return Orientation(yaw=math.degrees(self.heading), pitch=0.0, roll=0.0)
+
+    def set_phone_pan(self, pan_position, pan_speed, blockid=None):
+        self._pan = pan_position
+        self._blockid += 1
+        return self._blockid
+
+    def read_phone_pan(self):
+        return self._pan
+
+    def set_phone_tilt(self, tilt_position, tilt_speed, blockid=None):
+        self._tilt = tilt_position
+        self._blockid += 1
+        return self._blockid
+
+    def read_phone_tilt(self):
+        return self._tilt
+
+    # Phone interaction is a no-op without hardware
+
+    def set_emotion(self, emotion):
+        pass
+
+    def talk(self, message):
+        pass
+
+    def play_emotion_sound(self, emotion):
+        pass
+
+    def set_led(self, selector, color):
+        pass
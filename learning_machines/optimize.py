@@ -0,0 +1,230 @@
+"""CMA-ES over the controller thresholds and motion primitives.
+
+The 14 parameters in PARAMETERS are scaled to [0, 1] and searched with
+CMA-ES, starting from the values of a base ControllerConfig. Each generation is
+evaluated in one go through sweep.evaluate, as a single BatchSimulation
+of popsize x episodes robots, or split over ``workers`` processes.
+Episodes are stopped as soon as they collide more than
+``max_collisions`` times, and each generation is logged to the catalog's
+generations table.
+
+    with Catalog() as catalog:
+        best = optimize(generations=40, episodes=8, catalog=catalog)
+    print(best['config'], best['fitness'])
+"""
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+from .cache import content_id
+from .catalog import Catalog
+from .config import SIMULATION
+from .sweep import evaluate
+
+# (name, low, high); every parameter is rounded to an integer before it is evaluated
+PARAMETERS = [
+    ('sensor_dodge_thresholds.FrontC', 10, 150),
+    ('sensor_dodge_thresholds.FrontRR', 10, 300),
+    ('sensor_dodge_thresholds.FrontLL', 10, 300),
+    ('sensor_dodge_thresholds.FrontL', 50, 1000),
+    ('sensor_dodge_thresholds.FrontR', 50, 1000),
+    ('big_dodge_thresholds.FrontC', 50, 1000),
+    ('big_dodge_thresholds.FrontRR', 50, 1000),
+    ('big_dodge_thresholds.FrontLL', 50, 1000),
+    ('wheel_speed', 30, 100),
+    ('consecutive', 2, 10),
+    ('move_back.millis', 300, 2000),
+    ('move_forward.millis', 100, 1000),
+    ('turn.speed', 10, 80),
+    ('turn.millis', 200, 1500),
+]
+LOW = np.array([low for _, low, _ in PARAMETERS], dtype=float)
+HIGH = np.array([high for _, _, high in PARAMETERS], dtype=float)
+
+# Fitness is minimised: collisions dominate, then distance covered, then dodges
+FITNESS_WEIGHTS = {'collisions': 10.0, 'distance': -1.0, 'dodges': 0.05}
+BOUNDARY_PENALTY = 100.0
+
+
+def current_values(config=SIMULATION):
+    """The settings of ``config`` as a parameter vector (unscaled)."""
+    values = {
+        **{f"sensor_dodge_thresholds.{key}": value for key, value in config.sensor_dodge_thresholds.items()},
+        **{f"big_dodge_thresholds.{key}": value for key, value in config.big_dodge_thresholds.items()},
+        'wheel_speed': config.wheel_speed,
+        'consecutive': config.consecutive,
+        'move_back.millis': config.move_back[2],
+        'move_forward.millis': config.move_forward[2],
+        'turn.speed': config.turn_right[0],
+        'turn.millis': config.turn_right[2],
+    }
+    return np.array([values[name] for name, _, _ in PARAMETERS], dtype=float)
+
+
+def decode(x):
+    """The config overrides of a scaled parameter vector (clipped to its bounds)."""
+    values = np.rint(LOW + np.clip(x, 0, 1) * (HIGH - LOW)).astype(int).tolist()
+    named = dict(zip((name for name, _, _ in PARAMETERS), values))
+    speed, turn_speed = named.pop('wheel_speed'), named.pop('turn.speed')
+    turn_millis = named.pop('turn.millis')
+    config = {name: value for name, value in named.items() if not name.startswith(('move_', 'turn'))}
+    config.update({
+        'wheel_speed': speed,
+        'move_back': (-speed, -speed, named['move_back.millis']),
+        'move_forward': (speed, speed, named['move_forward.millis']),
+        'turn_right': (turn_speed, -turn_speed, turn_millis),
+        'turn_left': (-turn_speed, turn_speed, turn_millis),
+    })
+    return config
+
+
+def fitness(result):
+    return (FITNESS_WEIGHTS['collisions'] * result['collisions']
+            + FITNESS_WEIGHTS['distance'] * result['distance']
+            + FITNESS_WEIGHTS['dodges'] * (result['obstacle_dodges'] + result['wall_dodges']))
+
+
+class CMAES:
+    """Minimal (mu/mu_w, lambda) CMA-ES with rank-one and rank-mu updates."""
+
+    def __init__(self, mean, sigma, popsize=None, seed=None):
+        n = self.dim = len(mean)
+        self.mean = np.array(mean, dtype=float)
+        self.sigma = sigma
+        self.popsize = popsize or 4 + int(3 * np.log(n))
+        self.mu = self.popsize // 2
+        weights = np.log(self.mu + 0.5) - np.log(np.arange(1, self.mu + 1))
+        self.weights = weights / weights.sum()
+        self.mu_eff = 1 / np.sum(self.weights ** 2)
+        self.cc = (4 + self.mu_eff / n) / (n + 4 + 2 * self.mu_eff / n)
+        self.cs = (self.mu_eff + 2) / (n + self.mu_eff + 5)
+        self.c1 = 2 / ((n + 1.3) ** 2 + self.mu_eff)
+        self.cmu = min(1 - self.c1, 2 * (self.mu_eff - 2 + 1 / self.mu_eff) / ((n + 2) ** 2 + self.mu_eff))
+        self.damps = 1 + 2 * max(0.0, np.sqrt((self.mu_eff - 1) / (n + 1)) - 1) + self.cs
+        self.chi_n = np.sqrt(n) * (1 - 1 / (4 * n) + 1 / (21 * n ** 2))
+        self.pc = np.zeros(n)
+        self.ps = np.zeros(n)
+        self.C = np.eye(n)
+        self.B = np.eye(n)
+        self.D = np.ones(n)
+        self.generation = 0
+        self.rng = np.random.default_rng(seed)
+
+    def ask(self):
+        """A (popsize, dim) array of candidate solutions."""
+        z = self.rng.standard_normal((self.popsize, self.dim))
+        return self.mean + self.sigma * (z * self.D) @ self.B.T
+
+    def tell(self, solutions, fitnesses):
+        """Update the distribution from the fitness (lower is better) of each solution."""
+        n = self.dim
+        order = np.argsort(fitnesses)[:self.mu]
+        y = (np.asarray(solutions)[order] - self.mean) / self.sigma
+        y_w = self.weights @ y
+        self.mean = self.mean + self.sigma * y_w
+
+        inv_sqrt_c = self.B @ np.diag(1 / self.D) @ self.B.T
+        self.ps = (1 - self.cs) * self.ps + np.sqrt(self.cs * (2 - self.cs) * self.mu_eff) * inv_sqrt_c @ y_w
+        ps_norm = np.linalg.norm(self.ps) / np.sqrt(1 - (1 - self.cs) ** (2 * (self.generation + 1)))
+        hsig = ps_norm / self.chi_n < 1.4 + 2 / (n + 1)
+        self.pc = (1 - self.cc) * self.pc + hsig * np.sqrt(self.cc * (2 - self.cc) * self.mu_eff) * y_w
+
+        rank_one = np.outer(self.pc, self.pc) + (1 - hsig) * self.cc * (2 - self.cc) * self.C
+        rank_mu = (y.T * self.weights) @ y
+        self.C = (1 - self.c1 - self.cmu) * self.C + self.c1 * rank_one + self.cmu * rank_mu
+        self.sigma *= np.exp((self.cs / self.damps) * (np.linalg.norm(self.ps) / self.chi_n - 1))
+
+        self.C = np.triu(self.C) + np.triu(self.C, 1).T
+        eigenvalues, self.B = np.linalg.eigh(self.C)
+        self.D = np.sqrt(np.maximum(eigenvalues, 1e-20))
+        self.generation += 1
+
+
+def _evaluate_generation(pool, workers, configs, **kwargs):
+    if pool is None:
+        return evaluate(configs, **kwargs)
+    chunks = [configs[i::workers] for i in range(workers)]
+    futures = [pool.submit(evaluate, chunk, **kwargs) for chunk in chunks if chunk]
+    results = [None] * len(configs)
+    for i, future in enumerate(futures):
+        results[i::workers] = future.result()
+    return results
+
+
+def optimize(generations=50, popsize=None, episodes=8, steps=100, sigma=0.2, seed=0, workers=1,
+             max_collisions=3, catalog=None, name=None, tol=1e-3, patience=15,
+             arena=None, base=SIMULATION, sensor_model=None, cache=None):
+    """Search for the controller parameters with the lowest fitness.
+
+    Every generation uses the same ``episodes`` start poses, so
+    candidates are compared on equal terms. Stops after ``generations``,
+    once sigma drops below ``tol``, or after ``patience`` generations
+    without a new best. Returns the best result (sweep.evaluate fields
+    plus 'fitness' and 'generation'); base.with_overrides(best['config'])
+    gives the ControllerConfig to run. With a calibration ``sensor_model``
+    the simulator reads like the hardware, so use base=HARDWARE. With a
+    ``cache`` directory, candidates that round to an already evaluated
+    configuration reuse its stored result. Without a ``name`` the run is
+    logged as cmaes_{date_time}_{settings ID}, so only a repeat of the very
+    same (deterministic) search in the same second shares its rows.
+    """
+    es = CMAES((current_values(base) - LOW) / (HIGH - LOW), sigma, popsize, seed)
+    if name is None:
+        settings = content_id({
+            'generations': generations, 'popsize': es.popsize,
+            'episodes': episodes, 'steps': steps, 'sigma': sigma, 'seed': seed,
+            'max_collisions': max_collisions, 'tol': tol, 'patience': patience,
+            'arena': arena, 'base': base, 'sensor_model': sensor_model,
+        })
+        name = f"cmaes_{datetime.now().strftime('%Y%m%d-%H%M%S')}_{settings}"
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    kwargs = {'episodes': episodes, 'steps': steps, 'arena': arena, 'seed': seed,
+              'max_collisions': max_collisions, 'base': base, 'sensor_model': sensor_model,
+              'cache': cache}
+    best, stale = None, 0
+    try:
+        for generation in range(generations):
+            start = time.perf_counter()
+            solutions = es.ask()
+            results = _evaluate_generation(pool, workers, [decode(x) for x in solutions], **kwargs)
+            outside = solutions - np.clip(solutions, 0, 1)
+            fitnesses = np.array([fitness(result) for result in results])
+            fitnesses += BOUNDARY_PENALTY * np.sum(outside ** 2, axis=1)
+            es.tell(solutions, fitnesses)
+
+            i = int(np.argmin(fitnesses))
+            if best is None or fitnesses[i] < best['fitness']:
+                best = dict(results[i], fitness=float(fitnesses[i]), generation=generation)
+                stale = 0
+            else:
+                stale += 1
+            if catalog is not None:
+                catalog.log_generation(
+                    optimization=name,
+                    generation=generation,
+                    evaluations=len(results) * episodes,
+                    best_fitness=float(fitnesses[i]),
+                    mean_fitness=float(fitnesses.mean()),
+                    median_fitness=float(np.median(fitnesses)),
+                    sigma=float(es.sigma),
+                    terminated=float(np.mean([result['terminated'] for result in results])),
+                    wall_time=time.perf_counter() - start,
+                    best_config=json.dumps(results[i]['config']),
+                )
+            print(f"Generation {generation}: best {fitnesses[i]:.3f}, mean {fitnesses.mean():.3f}, "
+                  f"sigma {es.sigma:.4f}, overall best {best['fitness']:.3f}")
+            if es.sigma < tol or stale >= patience:
+                break
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return best
+
+
+if __name__ == "__main__":
+    with Catalog() as catalog:
+        best = optimize(catalog=catalog)
+    print(json.dumps(best))
@@ -0,0 +1,116 @@
+"""Fan the runs of a multi-run batch out over a process pool.
+
+Each worker process builds its own robot once, through
+``make_robot(slot, arena)`` with a distinct slot number and the batch
+config's arena, and reuses it for every run it is given. The
+output goes into the same runs{N}_{datetime} layout run_all_actions uses.
+
+Run i on a LocalRobobo starts from pose i of random_starts(arena, N, seed),
+so the batch covers different starts (run 0 keeps the arena's usual one),
+and its generator is reseeded with (seed, i), so a disturbed batch is
+reproducible whichever worker runs it. Such runs record a run_id in
+their metadata, the content ID of their settings (see runs). CoppeliaSim
+runs start where the scene puts them and have none.
+
+    run_all_actions_parallel(config=SIMULATION.with_overrides({'count_runs': 50}))   # LocalRobobo workers
+    run_all_actions_parallel(partial(local_simulator, disturbance=HARDWARE_LIKE), seed=0)
+    run_all_actions_parallel(partial(coppelia_simulator, base_port=23000), workers=4)
+"""
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from robobo_interface import SimulationRobobo
+
+from . import task0_g6
+from .batch_sim import random_starts
+from .local_sim import LocalRobobo
+from .runs import run_id as episode_id
+
+_worker_rob = None
+
+
+def local_simulator(slot, arena, disturbance=None):
+    """A LocalRobobo, optionally disturbed (see disturbances); _run seeds it per run."""
+    return LocalRobobo(arena=arena, disturbance=disturbance)
+
+
+def coppelia_simulator(slot, arena, base_port=23000):
+    """A SimulationRobobo on its own CoppeliaSim instance, one port per worker.
+
+    The arena is whichever scene that instance has loaded.
+    """
+    return SimulationRobobo(api_port=base_port + slot)
+
+
+def _init_worker(make_robot, slots, date_time, arena):
+    global _worker_rob
+    with slots.get_lock():
+        slot = slots.value
+        slots.value += 1
+    # Spawned workers re-import task0_g6; keep every run in the parent's batch
+    task0_g6.current_datetime = date_time
+    _worker_rob = make_robot(slot, arena)
+
+
+def _run(run, config, steps, start, seed):
+    run_id = None
+    if isinstance(_worker_rob, LocalRobobo):
+        assert _worker_rob.arena == config.arena, f"{_worker_rob.arena} robot for a {config.arena} run"
+        _worker_rob.place(start)
+        _worker_rob.reseed((seed, run))
+        if config.simulation:
+            run_id = episode_id(config, (seed, run), steps, _worker_rob.disturbance, _worker_rob.sensor_model, start)
+    grouped_data_dir = task0_g6.create_output_dirs(config, run)
+    meta_data = task0_g6.run_episode(_worker_rob, grouped_data_dir, steps=steps, config=config, run_id=run_id)
+    # Worker processes exit without running atexit hooks, so drain the plot queue here
+    task0_g6.wait_for_plots()
+    return run, meta_data
+
+
+def run_all_actions_parallel(make_robot=local_simulator, config=task0_g6.DEFAULT_CONFIG, workers=None, steps=100,
+                             seed=0):
+    """Run ``config.count_runs`` episodes across ``workers`` processes and aggregate their metadata.
+
+    Returns the per-run metadata ordered by run index; the aggregate is also
+    saved as meta_data_runs.json in the batch directory.
+    """
+    count = config.count_runs
+    workers = min(workers or os.cpu_count() or 1, count)
+    starts = random_starts(config.arena, count, seed)
+    slots = multiprocessing.Value('i', 0)
+    start = time.perf_counter()
+    results = {}
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(make_robot, slots, task0_g6.current_datetime, config.arena),
+    ) as pool:
+        futures = [pool.submit(_run, run, config, steps, tuple(starts[run]), seed) for run in range(count)]
+        for future in as_completed(futures):
+            run, meta_data = future.result()
+            results[run] = meta_data
+            print(f"Run {run} done ({len(results)}/{count})")
+
+    runs = [results[run] for run in range(count)]
+    aggregate = {
+        'date_time': task0_g6.current_datetime,
+        'simulation': config.simulation,
+        'runs': count,
+        'workers': workers,
+        'seed': seed,
+        'wall_time': time.perf_counter() - start,
+        'obstacle_dodges': sum(meta['obstacle_dodges'] for meta in runs),
+        'wall_dodges': sum(meta['wall_dodges'] for meta in runs),
+        'total_steps': sum(meta['total_steps'] for meta in runs),
+        'per_run': [
+            {key: meta[key] for key in ('obstacle_dodges', 'wall_dodges', 'total_steps')}
+            for meta in runs
+        ],
+        'sensor_dodge_thresholds': config.sensor_dodge_thresholds,
+        'wall_dodge_thresholds': config.big_dodge_thresholds,
+        'config': config.to_dict(),
+    }
+    task0_g6.save_meta_data(aggregate, 'meta_data_runs.json', task0_g6.batch_dir(count))
+    return runs
@@ -0,0 +1,129 @@
+"""Render run plots off the critical path.
+
+Figures are built with matplotlib's object API on an Agg canvas, never
+through pyplot, so nothing is registered with a GUI backend and each
+figure is freed as soon as its PNG is written. PlotWorker queues render
+jobs on a background thread (or a single process, for CPU-bound
+simulated batches) so the next episode can start while the previous
+one's plot is still being encoded.
+
+    with PlotWorker() as plots:
+        plots.submit_sensor_plot(readings, 'Task0 Group6', path)
+"""
+import atexit
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+MAX_POINTS = 2000
+
+
+def downsample(values, max_points=MAX_POINTS):
+    """(steps, values) of a (n, k) trace reduced to about ``max_points`` rows.
+
+    Each bucket of consecutive rows contributes its per-column min and max,
+    so short IR spikes survive the reduction.
+    """
+    values = np.asarray(values, dtype=float)
+    if values.ndim == 1:
+        values = values[:, None]
+    n = len(values)
+    if max_points is None or n <= max(max_points, 2):
+        return np.arange(n), values
+    buckets = max_points // 2
+    size = -(-n // buckets)
+    padded = np.full((buckets * size, values.shape[1]), np.nan)
+    padded[:n] = values
+    blocks = padded.reshape(buckets, size, -1)
+    starts = np.arange(buckets) * size
+    keep = starts < n
+    steps = np.stack([starts, np.minimum(starts + size - 1, n - 1)], axis=1)[keep].ravel()
+    lows, highs = np.fmin.reduce(blocks, axis=1), np.fmax.reduce(blocks, axis=1)
+    reduced = np.stack([lows, highs], axis=1)[keep].reshape(-1, values.shape[1])
+    return steps, reduced
+
+
+def render_sensor_plot(readings, title, filename, max_points=MAX_POINTS):
+    """Draw one line per column of ``readings`` and save the figure as ``filename``."""
+    steps, values = downsample(readings, max_points)
+    figure = Figure()
+    FigureCanvasAgg(figure)
+    axes = figure.add_subplot()
+    for sensor_index in range(values.shape[1]):
+        axes.plot(steps, values[:, sensor_index], label=f'Sensor {sensor_index + 1}')
+    axes.set_xlabel('Steps')
+    axes.set_ylabel('IR Sensor Values')
+    axes.set_title(title)
+    axes.legend()
+    figure.savefig(str(filename))
+    figure.clear()
+    return str(filename)
+
+
+class PlotWorker:
+    """Runs render jobs in the background, one at a time, in submission order."""
+
+    def __init__(self, processes=False, max_points=MAX_POINTS):
+        self.max_points = max_points
+        executor = ProcessPoolExecutor if processes else ThreadPoolExecutor
+        self._executor = executor(max_workers=1)
+        self._pending = []
+        self.errors = []
+
+    def submit_sensor_plot(self, readings, title, filename):
+        readings = np.asarray(readings, dtype=float)
+        future = self._executor.submit(render_sensor_plot, readings, title, filename, self.max_points)
+        self._pending.append(future)
+        self._pending = [job for job in self._pending if not self._collect(job)]
+        return future
+
+    def _collect(self, future):
+        if not future.done():
+            return False
+        if future.exception() is not None:
+            self.errors.append(future.exception())
+        return True
+
+    def wait(self):
+        """Block until every queued plot is written; returns (and forgets) the errors since the last wait."""
+        for future in self._pending:
+            future.exception()
+            self._collect(future)
+        self._pending = []
+        errors, self.errors = self.errors, []
+        return errors
+
+    def close(self):
+        self.wait()
+        self._executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+_default_worker = None
+
+
+def default_worker():
+    """The shared background PlotWorker, started on first use and drained at exit."""
+    global _default_worker
+    if _default_worker is None:
+        _default_worker = PlotWorker()
+        atexit.register(_default_worker.close)
+    return _default_worker
+
+
+def _forget_default_worker():
+    # A forked child inherits the worker without its thread; queued plots would never run
+    global _default_worker
+    _default_worker = None
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_forget_default_worker)
@@ -0,0 +1,88 @@
+"""Append-only, streaming record of an episode.
+
+EpisodeRecorder writes one CSV row per controller step as it happens,
+through a buffered file that is flushed every ``flush_every`` rows or
+``flush_interval`` seconds. Memory stays constant however long the run,
+and an interrupted run keeps everything up to the last flush. The
+save_to_csv layout can be derived from the stream with
+iter_sensor_readings. Dodge events (step, type and IR values) can be
+streamed the same way to a second file.
+"""
+import csv
+import os
+import time
+
+from .local_sim import IR_NAMES
+
+STREAM_COLUMNS = ['Step'] + IR_NAMES + ['WallDodge', 'ObstacleDodge', 'Action', 'Timestamp']
+DODGE_COLUMNS = ['Step', 'Type'] + IR_NAMES
+
+
+class EpisodeRecorder:
+    """Streams per-step IR values, dodge flags, action and timestamp to ``filename``.
+
+    With a ``dodge_filename``, record_dodge writes one row per dodge there.
+    """
+
+    def __init__(self, filename, flush_every=25, flush_interval=1.0, fsync=False, dodge_filename=None):
+        self.filename = filename
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.rows = 0
+        self._file = open(filename, 'w', newline='')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(STREAM_COLUMNS)
+        self._dodge_file = open(dodge_filename, 'w', newline='') if dodge_filename is not None else None
+        if self._dodge_file is not None:
+            self._dodge_writer = csv.writer(self._dodge_file)
+            self._dodge_writer.writerow(DODGE_COLUMNS)
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def record(self, step, irs, wall_dodge, obstacle_dodge, action, timestamp):
+        self._writer.writerow([step, *irs, wall_dodge, obstacle_dodge, action, timestamp])
+        self.rows += 1
+        self._pending += 1
+        if self._pending >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def record_dodge(self, step, kind, irs):
+        # Rare next to steps, and flushed along with them
+        if self._dodge_file is not None:
+            self._dodge_writer.writerow([step, kind, *irs])
+
+    def flush(self):
+        for file in (self._file, self._dodge_file):
+            if file is None:
+                continue
+            file.flush()
+            if self.fsync:
+                os.fsync(file.fileno())
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+            if self._dodge_file is not None:
+                self._dodge_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def iter_steps(filename):
+    """Yield the rows of a recorder stream as dicts."""
+    with open(filename, newline='') as csvfile:
+        yield from csv.DictReader(csvfile)
+
+
+def iter_sensor_readings(filename):
+    """Yield the stream as save_to_csv rows: 8 IR values, WallDodge, ObstacleDodge."""
+    for row in iter_steps(filename):
+        yield [float(row[name] or 'nan') for name in IR_NAMES] + [int(row['WallDodge']), int(row['ObstacleDodge'])]
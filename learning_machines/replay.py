@@ -0,0 +1,136 @@
+"""Replay recorded IR traces through a controller and diff its dodge decisions.
+
+A controller is any picklable callable that takes an (n, 8) array of IR
+readings and returns (wall_dodge, obstacle_dodge) boolean arrays; the
+task0_group_6 law for a ControllerConfig is ConfigController. The
+recorded readings are fed through it open loop, so a changed decision
+shows where the new controller would have acted differently, not what
+it would have seen afterwards.
+
+    python -m learning_machines.replay grouped_data/runs50_20240101-120000 --config tweak.json
+
+Run directories (or single .rbep / data / steps files) are replayed in
+parallel worker processes. Without a controller each run is replayed
+with the thresholds it was recorded with, which checks the decision
+kernel against the recorded flags.
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from pathlib import Path
+
+import numpy as np
+
+from .catalog import RUN_DIR_PATTERN
+from .config import HARDWARE, SIMULATION, ControllerConfig
+from .decisions import config_thresholds, decide
+from .report import load_run, load_trace
+
+
+class ConfigController:
+    """The task0_group_6 dodge decisions of ``config`` over a whole trace."""
+
+    def __init__(self, config=SIMULATION):
+        self.config = config
+
+    def __call__(self, irs):
+        decision = decide(irs, config_thresholds(self.config))
+        return decision.wall_dodge, decision.obstacle_dodge
+
+
+def recorded_config(metadata):
+    """The ControllerConfig a run was recorded with, as far as its metadata tells."""
+    if 'config' in metadata:
+        return SIMULATION.with_overrides(metadata['config'])
+    base = SIMULATION if metadata.get('simulation', True) else HARDWARE
+    overrides = {
+        'sensor_thresholds': metadata.get('sensor_thresholds'),
+        'sensor_dodge_thresholds': metadata.get('sensor_dodge_thresholds'),
+        'big_dodge_thresholds': metadata.get('wall_dodge_thresholds'),
+    }
+    return base.with_overrides({key: value for key, value in overrides.items() if value})
+
+
+def find_runs(root):
+    """Run directories below ``root``; ``root`` itself if it is a run directory or a file."""
+    root = Path(root)
+    if root.is_file() or RUN_DIR_PATTERN.match(root.name):
+        return [root]
+    return sorted(
+        Path(dirpath) / dirname
+        for dirpath, dirnames, _ in os.walk(root)
+        for dirname in dirnames if RUN_DIR_PATTERN.match(dirname)
+    )
+
+
+def replay_run(path, controller=None):
+    """Diff the decisions of ``controller`` against one recorded run."""
+    path = Path(path)
+    if path.is_file():
+        metadata, (irs, wall, obstacle) = {}, load_trace(path)
+    else:
+        metadata, irs, wall, obstacle = load_run(path)
+    if controller is None:
+        controller = ConfigController(recorded_config(metadata))
+    new_wall, new_obstacle = (np.asarray(flags, dtype=bool) for flags in controller(irs))
+    wall_diff = np.flatnonzero(new_wall != wall)
+    obstacle_diff = np.flatnonzero(new_obstacle != obstacle)
+    changed = np.union1d(wall_diff, obstacle_diff)
+    return {
+        'path': str(path),
+        'steps': len(irs),
+        'recorded_wall_dodges': int(wall.sum()),
+        'recorded_obstacle_dodges': int(obstacle.sum()),
+        'wall_dodges': int(new_wall.sum()),
+        'obstacle_dodges': int(new_obstacle.sum()),
+        'changed_steps': changed.tolist(),
+        'wall_changed_steps': wall_diff.tolist(),
+        'obstacle_changed_steps': obstacle_diff.tolist(),
+    }
+
+
+def replay(roots, controller=None, workers=None, chunksize=8):
+    """Replay every run below ``roots`` in parallel; one replay_run result per run."""
+    if isinstance(roots, (str, Path)):
+        roots = [roots]
+    paths = [path for root in roots for path in find_runs(root)]
+    if not paths:
+        return []
+    workers = min(workers or os.cpu_count() or 1, len(paths))
+    if workers == 1:
+        return [replay_run(path, controller) for path in paths]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(replay_run, paths, repeat(controller), chunksize=chunksize))
+
+
+def summarize(results):
+    steps = sum(result['steps'] for result in results)
+    changed = sum(len(result['changed_steps']) for result in results)
+    return {
+        'runs': len(results),
+        'runs_changed': sum(bool(result['changed_steps']) for result in results),
+        'steps': steps,
+        'steps_changed': changed,
+        'agreement': 1 - changed / steps if steps else 1.0,
+        'recorded_wall_dodges': sum(result['recorded_wall_dodges'] for result in results),
+        'wall_dodges': sum(result['wall_dodges'] for result in results),
+        'recorded_obstacle_dodges': sum(result['recorded_obstacle_dodges'] for result in results),
+        'obstacle_dodges': sum(result['obstacle_dodges'] for result in results),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('roots', nargs='+', help="run directories, batches, or grouped_data")
+    parser.add_argument('--config', help="ControllerConfig JSON to replay (default: each run's own thresholds)")
+    parser.add_argument('--workers', type=int)
+    args = parser.parse_args()
+    controller = ConfigController(ControllerConfig.from_file(args.config)) if args.config else None
+    results = replay(args.roots, controller, args.workers)
+    for result in results:
+        if result['changed_steps']:
+            print(f"{result['path']}: {len(result['changed_steps'])}/{result['steps']} steps changed, "
+                  f"wall {result['recorded_wall_dodges']} -> {result['wall_dodges']}, "
+                  f"obstacle {result['recorded_obstacle_dodges']} -> {result['obstacle_dodges']}")
+    print(summarize(results))
@@ -0,0 +1,196 @@
+"""One summary figure for every run of a runs{N}_{datetime} batch.
+
+    python -m learning_machines.report path/to/runs50_20240101-120000
+
+load_batch reads all run directories in parallel (the .rbep episode when
+there is one, otherwise the data CSV or recorder stream) into flat arrays, summarize_batch
+reduces them to per-sensor distributions, dodge rates and step counts in
+a few vectorized passes, and render_report draws them as one multi-panel
+PNG next to a report.json with the same numbers.
+"""
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from .catalog import RUN_DIR_PATTERN
+from .episode_format import EXTENSION, load_episode, records_from_stream
+from .local_sim import IR_NAMES
+from .task0_g6 import load_meta_data
+
+PERCENTILES = [5, 25, 50, 75, 95]
+
+
+def _from_records(records):
+    return records['irs'].astype(float), records['wall_dodge'].astype(bool), records['obstacle_dodge'].astype(bool)
+
+
+def load_data_csv(filename):
+    """(irs, wall_dodge, obstacle_dodge) of a save_to_csv file."""
+    data = np.genfromtxt(filename, delimiter=',', skip_header=1, ndmin=2).reshape(-1, len(IR_NAMES) + 2)
+    flags = np.nan_to_num(data[:, len(IR_NAMES):]).astype(bool)
+    return data[:, :len(IR_NAMES)], flags[:, 0], flags[:, 1]
+
+
+def load_trace(path):
+    """(irs, wall_dodge, obstacle_dodge) of an episode file, recorder stream or save_to_csv file."""
+    path = Path(path)
+    if path.suffix == EXTENSION:
+        return _from_records(load_episode(path, mmap=False)[1])
+    with open(path) as file:
+        header = file.readline()
+    if header.startswith('Step,'):
+        return _from_records(records_from_stream(path))
+    return load_data_csv(path)
+
+
+def load_run(run_dir):
+    """(metadata, irs, wall_dodge, obstacle_dodge) of one run directory.
+
+    Reads the .rbep episode if there is one, then data_*.csv, then the
+    steps_*.csv recorder stream.
+    """
+    run_dir = Path(run_dir)
+    episodes = sorted(run_dir.glob(f"*{EXTENSION}"))
+    if episodes:
+        header, records = load_episode(episodes[0], mmap=False)
+        return (header['metadata'], *_from_records(records))
+    meta_files = [run_dir / 'meta_data_final.json', run_dir / 'meta_data_final.txt']
+    metadata = next((load_meta_data(path) for path in meta_files if path.exists()), {})
+    traces = sorted(run_dir.glob('data_*.csv')) + sorted(run_dir.glob('steps_*.csv'))
+    if traces:
+        return (metadata, *load_trace(traces[0]))
+    return metadata, np.zeros((0, len(IR_NAMES))), np.zeros(0, dtype=bool), np.zeros(0, dtype=bool)
+
+
+def run_dirs(batch_dir):
+    return sorted(path for path in Path(batch_dir).iterdir() if path.is_dir() and RUN_DIR_PATTERN.match(path.name))
+
+
+def load_batch(batch_dir, workers=None):
+    """Every run of a batch, concatenated.
+
+    Returns a dict with 'runs' (directory names), 'metadata' (list),
+    'irs' (total_steps, 8), 'wall_dodge' and 'obstacle_dodge' (total_steps,)
+    and 'run_index' mapping each step to its run.
+    """
+    dirs = run_dirs(batch_dir)
+    with ThreadPoolExecutor(max_workers=workers or min(32, (os.cpu_count() or 1) + 4)) as pool:
+        loaded = list(pool.map(load_run, dirs))
+    lengths = np.array([len(irs) for _, irs, _, _ in loaded], dtype=int)
+
+    def concat(index, empty):
+        return np.concatenate([run[index] for run in loaded]) if loaded else empty
+
+    return {
+        'runs': [path.name for path in dirs],
+        'metadata': [metadata for metadata, _, _, _ in loaded],
+        'irs': concat(1, np.zeros((0, len(IR_NAMES)))),
+        'wall_dodge': concat(2, np.zeros(0, dtype=bool)),
+        'obstacle_dodge': concat(3, np.zeros(0, dtype=bool)),
+        'run_index': np.repeat(np.arange(len(loaded)), lengths),
+        'steps': lengths,
+    }
+
+
+def summarize_batch(batch):
+    """Per-sensor percentiles, per-run dodge counts and rates, and step counts."""
+    runs = len(batch['runs'])
+    steps = batch['steps']
+    wall = np.bincount(batch['run_index'], weights=batch['wall_dodge'], minlength=runs)
+    obstacle = np.bincount(batch['run_index'], weights=batch['obstacle_dodge'], minlength=runs)
+    per_step = np.maximum(steps, 1)
+    irs = batch['irs']
+    if len(irs):
+        percentiles = np.nanpercentile(irs, PERCENTILES, axis=0)
+    else:
+        percentiles = np.full((len(PERCENTILES), len(IR_NAMES)), np.nan)
+    return {
+        'runs': runs,
+        'total_steps': int(steps.sum()),
+        'steps': steps.tolist(),
+        'wall_dodges': wall.astype(int).tolist(),
+        'obstacle_dodges': obstacle.astype(int).tolist(),
+        'wall_dodge_rate': float(wall.sum() / max(steps.sum(), 1)),
+        'obstacle_dodge_rate': float(obstacle.sum() / max(steps.sum(), 1)),
+        'wall_dodge_rates': (wall / per_step).tolist(),
+        'obstacle_dodge_rates': (obstacle / per_step).tolist(),
+        'ir_percentiles': {
+            name: dict(zip(map(str, PERCENTILES), percentiles[:, i].tolist())) for i, name in enumerate(IR_NAMES)
+        },
+    }
+
+
+def _step_profile(batch):
+    """(max_steps, 8) median and 25/75th percentile IR value at each step index across runs."""
+    longest = int(batch['steps'].max(initial=0))
+    if longest == 0:
+        return np.zeros((3, 0, len(IR_NAMES)))
+    grid = np.full((len(batch['runs']), longest, len(IR_NAMES)), np.nan)
+    offsets = np.concatenate([[0], np.cumsum(batch['steps'])[:-1]]).astype(int)
+    step_index = np.arange(len(batch['irs'])) - np.repeat(offsets, batch['steps'])
+    grid[batch['run_index'], step_index] = batch['irs']
+    return np.nanpercentile(grid, [25, 50, 75], axis=0)
+
+
+def render_report(batch, summary, filename, title=None):
+    figure = Figure(figsize=(14, 10))
+    FigureCanvasAgg(figure)
+    (dist, trace), (rates, counts) = figure.subplots(2, 2)
+    irs = batch['irs']
+
+    dist.boxplot([column[~np.isnan(column)] for column in irs.T], showfliers=False)
+    dist.set_xticks(np.arange(1, len(IR_NAMES) + 1), IR_NAMES)
+    dist.set_yscale('log')
+    dist.set_title('IR distribution per sensor')
+    dist.set_ylabel('IR Sensor Values')
+
+    low, median, high = _step_profile(batch)
+    for i, name in enumerate(IR_NAMES):
+        line, = trace.plot(median[:, i], label=name)
+        trace.fill_between(np.arange(len(median)), low[:, i], high[:, i], color=line.get_color(), alpha=0.15)
+    trace.set_yscale('log')
+    trace.set_title('Median IR per step (IQR shaded)')
+    trace.set_xlabel('Steps')
+    trace.legend(fontsize='small', ncol=2)
+
+    index = np.arange(summary['runs'])
+    rates.bar(index, summary['obstacle_dodge_rates'], label='Obstacle dodges')
+    rates.bar(index, summary['wall_dodge_rates'], bottom=summary['obstacle_dodge_rates'], label='Wall dodges')
+    rates.set_title(f"Dodges per step (obstacle {summary['obstacle_dodge_rate']:.3f}, "
+                    f"wall {summary['wall_dodge_rate']:.3f})")
+    rates.set_xlabel('Run')
+    rates.legend()
+
+    counts.hist(batch['steps'], bins=min(30, max(summary['runs'], 1)))
+    counts.set_title(f"Steps per run ({summary['total_steps']} total)")
+    counts.set_xlabel('Steps')
+    counts.set_ylabel('Runs')
+
+    figure.suptitle(title or f"{summary['runs']} runs")
+    figure.tight_layout()
+    figure.savefig(str(filename))
+    figure.clear()
+
+
+def report(batch_dir, workers=None):
+    """Load a batch, write report.json and report.png into it and return the summary."""
+    batch_dir = Path(batch_dir)
+    batch = load_batch(batch_dir, workers)
+    summary = summarize_batch(batch)
+    summary['run_dirs'] = batch['runs']
+    with open(batch_dir / 'report.json', 'w') as file:
+        json.dump(summary, file, indent=2)
+    render_report(batch, summary, batch_dir / 'report.png', title=batch_dir.name)
+    return summary
+
+
+if __name__ == "__main__":
+    for path in sys.argv[1:]:
+        summary = report(path)
+        print(f"{path}: {summary['runs']} runs, {summary['total_steps']} steps -> {Path(path) / 'report.png'}")
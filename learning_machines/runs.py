@@ -0,0 +1,123 @@
+"""Seeded task0_group_6 episodes on LocalRobobo, identified by their content.
+
+An episode on the local simulator is fully determined by its config,
+its seed and the simulator settings. The seed picks the start pose and
+drives any disturbance. Those inputs are hashed into a run ID (see
+cache.content_id), and the episode is written to a directory named
+after it:
+
+    grouped_data/seeded/sim_{arena}_{run_id}/
+
+That directory holds the usual run_episode output plus run.json with the
+spec and the outcome. run_seeded returns the stored outcome when the
+directory is complete, and only simulates the episode otherwise.
+
+    result = run_seeded(SIMULATION.with_overrides({'sensor_dodge_thresholds.FrontC': 40}), seed=3)
+
+    python -m learning_machines.runs --seeds 0 1 2 --config tweak.json
+"""
+import argparse
+import json
+import shutil
+from dataclasses import asdict
+from pathlib import Path
+
+from . import task0_g6
+from .batch_sim import random_starts
+from .cache import config_spec, content_id, write_json
+from .catalog import GROUPED_DATA_DIR
+from .config import SIMULATION, ControllerConfig
+from .local_sim import ARENAS, LocalRobobo
+
+SEEDED_DIR = GROUPED_DATA_DIR / "seeded"
+RUN_FILE = 'run.json'
+
+
+def start_pose(arena, seed):
+    """A free start pose drawn from ``seed``; the arena's usual start for seed None."""
+    if seed is None:
+        return ARENAS[arena]['start']
+    return tuple(random_starts(arena, 2, seed)[1].tolist())
+
+
+def episode_config(config):
+    # The local simulator only moves while playing, and a sampler thread would not be reproducible
+    return config.with_overrides({'simulation': True, 'sampled': False})
+
+
+def episode_spec(config, seed, steps=100, disturbance=None, sensor_model=None, start=None):
+    """Everything that determines a seeded episode, as plain data.
+
+    The start pose follows from the seed unless it is given explicitly,
+    as for the runs of a parallel batch.
+    """
+    spec = {
+        'simulator': 'LocalRobobo',
+        'config': config_spec(episode_config(config)),
+        'seed': seed,
+        'steps': steps,
+        'disturbance': asdict(disturbance) if disturbance is not None else None,
+        'sensor_model': sensor_model.to_dict() if sensor_model is not None else None,
+    }
+    if start is not None:
+        spec['start'] = [float(value) for value in start]
+    return spec
+
+
+def run_id(config, seed, steps=100, disturbance=None, sensor_model=None, start=None):
+    return content_id(episode_spec(config, seed, steps, disturbance, sensor_model, start))
+
+
+def load_result(run_dir):
+    """The stored outcome of a seeded run directory, or None if it did not finish."""
+    try:
+        with open(Path(run_dir) / RUN_FILE) as file:
+            return json.load(file)['result']
+    except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        return None
+
+
+def run_seeded(config=SIMULATION, seed=0, steps=100, disturbance=None, sensor_model=None,
+               root=SEEDED_DIR, force=False):
+    """Run (or look up) the episode of ``config`` and ``seed``; returns its outcome dict.
+
+    The outcome has the run_id, collisions, distance, sim_time, dodge
+    counts, preemptions and total_steps. Configs that differ only in
+    settings that do not affect an episode (count_runs, timed, ...) share
+    a run.
+    """
+    config = episode_config(config)
+    spec = episode_spec(config, seed, steps, disturbance, sensor_model)
+    key = content_id(spec)
+    run_dir = Path(root) / f"sim_{config.arena}_{key}"
+    if not force:
+        result = load_result(run_dir)
+        if result is not None:
+            return result
+    # Files are named by date and time, so a rerun would leave the old ones next to the new
+    shutil.rmtree(run_dir, ignore_errors=True)
+    run_dir.mkdir(parents=True)
+    rob = LocalRobobo(config.arena, start=start_pose(config.arena, seed), sensor_model=sensor_model,
+                      disturbance=disturbance, seed=seed)
+    metadata = task0_g6.run_episode(rob, run_dir, steps=steps, config=config, run_id=key)
+    task0_g6.wait_for_plots()
+    result = {
+        'run_id': key,
+        **rob.last_episode,
+        **{name: metadata[name] for name in ('obstacle_dodges', 'wall_dodges', 'preemptions', 'total_steps')},
+    }
+    # Written last: a run.json means the directory is complete
+    write_json(run_dir / RUN_FILE, {'run_id': key, 'spec': spec, 'result': result})
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run seeded task0_group_6 episodes on LocalRobobo, reusing stored ones")
+    parser.add_argument('--seeds', type=int, nargs='+', default=[0])
+    parser.add_argument('--config', help="ControllerConfig JSON (default: SIMULATION)")
+    parser.add_argument('--steps', type=int, default=100)
+    parser.add_argument('--force', action='store_true', help="simulate even if a stored result exists")
+    args = parser.parse_args()
+    config = ControllerConfig.from_file(args.config) if args.config else SIMULATION
+    for seed in args.seeds:
+        print(json.dumps(run_seeded(config, seed, args.steps, force=args.force)))
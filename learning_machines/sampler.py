@@ -0,0 +1,114 @@
+"""Background sensor sampling into a preallocated ring buffer.
+
+SensorSampler polls ``rob.read_irs()`` (and optionally the wheels and
+orientation) on its own thread at a fixed rate, so the controller always
+sees readings at most one period old, whatever its maneuvers take, and
+the full-rate stream can be saved next to the run data.
+
+There is a single writer; readers never take a lock. A sample is written
+in full before the published count moves past it, and readers copy out
+of the buffer, which is safe as long as they do not ask for more than
+half the capacity (the writer would have to lap them mid-copy).
+
+The sampler talks to the robot from a second thread, which suits
+HardwareRobobo. CoppeliaSim's remote API client is not thread-safe, and
+LocalRobobo runs on a virtual clock, so neither should be sampled this way.
+"""
+import threading
+import time
+
+import numpy as np
+
+
+class SensorSampler:
+    """Polls the IR sensors of ``rob`` at ``rate_hz`` into a ring buffer."""
+
+    def __init__(self, rob, rate_hz=50.0, capacity=4096, wheels=False, orientation=False):
+        self.rob = rob
+        self.period = 1.0 / rate_hz
+        self.capacity = capacity
+        self.times = np.zeros(capacity)
+        self.irs = np.full((capacity, 8), np.nan)
+        self.wheels = np.zeros((capacity, 4)) if wheels else None
+        self.orientation = np.zeros((capacity, 3)) if orientation else None
+        self.errors = 0
+        self._count = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def count(self):
+        """Number of samples taken so far (including overwritten ones)."""
+        return self._count
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sensor-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _run(self):
+        deadline = time.monotonic()
+        while not self._stop.is_set():
+            slot = self._count % self.capacity
+            try:
+                irs = self.rob.read_irs()
+                if self.wheels is not None:
+                    wheels = self.rob.read_wheels()
+                    self.wheels[slot] = (wheels.wheel_pos_l, wheels.wheel_pos_r,
+                                         wheels.wheel_speed_l, wheels.wheel_speed_r)
+                if self.orientation is not None:
+                    orientation = self.rob.read_orientation()
+                    self.orientation[slot] = (orientation.yaw, orientation.pitch, orientation.roll)
+            except Exception:
+                self.errors += 1
+            else:
+                self.irs[slot] = [np.nan if value is None else value for value in irs]
+                self.times[slot] = time.monotonic()
+                self._count += 1  # publish only once the slot is complete
+            deadline += self.period
+            self._stop.wait(max(deadline - time.monotonic(), 0.0))
+
+    def latest(self):
+        """(timestamp, irs) of the newest sample, or None before the first one."""
+        count = self._count
+        if count == 0:
+            return None
+        slot = (count - 1) % self.capacity
+        return self.times[slot], self.irs[slot].copy()
+
+    def latest_irs(self):
+        """Newest IR reading as a list, like ``rob.read_irs()``, or None."""
+        sample = self.latest()
+        return None if sample is None else sample[1].tolist()
+
+    def window(self, n):
+        """(timestamps, irs) of the newest ``n`` samples, oldest first."""
+        count = self._count
+        n = min(n, count, self.capacity // 2)
+        slots = np.arange(count - n, count) % self.capacity
+        return self.times[slots], self.irs[slots]
+
+    def save(self, filename):
+        """Write every sample still in the buffer, oldest first, to an .npz file."""
+        count = self._count
+        n = min(count, self.capacity)
+        slots = np.arange(count - n, count) % self.capacity
+        arrays = {'times': self.times[slots], 'irs': self.irs[slots]}
+        if self.wheels is not None:
+            arrays['wheels'] = self.wheels[slots]
+        if self.orientation is not None:
+            arrays['orientation'] = self.orientation[slots]
+        np.savez(filename, **arrays)
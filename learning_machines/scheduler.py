@@ -0,0 +1,62 @@
+"""Deadline-based waiting that keeps the IR sensors polled during maneuvers.
+
+task0_group_6 issues ``rob.move(...)`` and then sleeps for the length of
+the maneuver, blind to the sensors. DeadlineScheduler.wait holds the same
+deadline but polls ``read_irs`` at a fixed rate in the meantime, and
+raises Preempted as soon as a poll satisfies the maneuver's preempt
+condition, so reactions cost one polling period instead of a full sleep.
+With a SensorSampler, polls take its newest sample instead of reading
+the robot from a second thread.
+"""
+import time
+
+from .instrument import unwrap
+from .local_sim import LocalRobobo
+
+
+class Preempted(Exception):
+    """A maneuver was cut short by a new reading."""
+
+    def __init__(self, irs):
+        super().__init__("maneuver preempted")
+        self.irs = irs
+
+
+class DeadlineScheduler:
+    """Waits out motion deadlines while polling the IR sensors at ``poll_hz``.
+
+    With ``poll_hz=None`` waits are plain blocking ``rob.sleep`` calls.
+    """
+
+    def __init__(self, rob, poll_hz=20.0, sampler=None):
+        self.rob = rob
+        self.sampler = sampler
+        self.period = 1.0 / poll_hz if poll_hz else None
+        # LocalRobobo sleeps advance a virtual clock, everything else sleeps in wall time
+        self.clock = rob.get_sim_time if isinstance(unwrap(rob), LocalRobobo) else time.monotonic
+        self.polls = 0
+        self.preemptions = 0
+
+    def read_irs(self):
+        """The sampler's newest IR reading, or ``rob.read_irs()`` without one (or before its first sample)."""
+        irs = self.sampler.latest_irs() if self.sampler is not None else None
+        return irs if irs is not None else self.rob.read_irs()
+
+    def wait(self, seconds, preempt=None):
+        """Sleep until ``seconds`` from now, raising Preempted if ``preempt(irs)`` holds."""
+        if self.period is None or preempt is None:
+            self.rob.sleep(seconds)
+            return
+        deadline = self.clock() + seconds
+        while True:
+            remaining = deadline - self.clock()
+            if remaining <= 0:
+                return
+            self.rob.sleep(min(self.period, remaining))
+            if self.clock() >= deadline:
+                return
+            irs = self.read_irs()
+            self.polls += 1
+            if preempt(irs):
+                self.preemptions += 1
+                raise Preempted(irs)
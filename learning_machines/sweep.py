@@ -0,0 +1,228 @@
+"""Parallel search over the controller's dodge thresholds and motion primitives.
+
+A configuration is a flat dict of ControllerConfig overrides, with dotted
+names for single thresholds and for the speed or duration of a motion
+primitive (see ControllerConfig.with_overrides):
+
+    {'sensor_dodge_thresholds.FrontC': 40, 'big_dodge_thresholds.FrontC': 200,
+     'wheel_speed': 90, 'turn_right.millis': 500, 'consecutive': 4}
+
+Anything left out keeps its value in the base config (SIMULATION by
+default). Every configuration is run for ``episodes`` episodes in
+batch_sim from the same set of start poses. The configurations are
+split into chunks, and each chunk runs as one BatchSimulation in a
+worker process, so a sweep scales with the number of cores. Finished
+chunks are appended to a JSONL checkpoint, and a rerun with the same
+checkpoint skips them.
+
+    configs = random_configs(SEARCH_SPACE, 500, seed=1)
+    ranked = sweep(configs, episodes=8, checkpoint='sweep.jsonl')
+"""
+import itertools
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+
+from .batch_sim import BatchController, BatchSimulation, random_starts, run_batch, stacked_params
+from .cache import ResultCache, config_spec, content_id
+from .config import SIMULATION
+
+# Lists are choices, (low, high) tuples are uniform ranges (integers if both ends are).
+# Whole primitives can only be listed as choices; range over their .speed and .millis instead.
+SEARCH_SPACE = {
+    'sensor_dodge_thresholds.FrontC': (15, 80),
+    'sensor_dodge_thresholds.FrontRR': (20, 150),
+    'sensor_dodge_thresholds.FrontLL': (20, 150),
+    'sensor_dodge_thresholds.FrontL': (100, 600),
+    'sensor_dodge_thresholds.FrontR': (100, 600),
+    'big_dodge_thresholds.FrontC': (100, 600),
+    'big_dodge_thresholds.FrontRR': (100, 600),
+    'big_dodge_thresholds.FrontLL': (100, 600),
+    'wheel_speed': [50, 65, 77, 90, 100],
+    'consecutive': [3, 4, 5, 6, 8],
+    'move_back.millis': [600, 900, 1200, 1500],
+    'move_forward.millis': [200, 350, 500],
+    'turn_right.speed': [20, 25, 35, 50],
+    'turn_right.millis': [450, 650, 850],
+    'turn_left.speed': [20, 25, 35, 50],
+    'turn_left.millis': [450, 650, 850],
+}
+
+
+def grid_configs(space):
+    """Every combination of the listed values of ``space``."""
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+
+
+def random_configs(space, n, seed=None):
+    """``n`` configurations sampled from ``space``."""
+    rng = np.random.default_rng(seed)
+    configs = []
+    for _ in range(n):
+        config = {}
+        for name, values in space.items():
+            if isinstance(values, tuple):
+                low, high = values
+                if isinstance(low, (tuple, list)) or isinstance(high, (tuple, list)):
+                    raise ValueError(f"{name}: ranges need numeric ends, not {values!r}; "
+                                     f"list the tuples as choices or range over {name}.speed / {name}.millis")
+                if isinstance(low, int) and isinstance(high, int):
+                    config[name] = int(rng.integers(low, high + 1))
+                else:
+                    config[name] = float(rng.uniform(low, high))
+            else:
+                config[name] = values[rng.integers(len(values))]
+        configs.append(config)
+    return configs
+
+
+def config_key(config, base=SIMULATION):
+    """Identifies a configuration by the full settings it resolves to."""
+    return json.dumps(base.with_overrides(config).to_dict(), sort_keys=True)
+
+
+def model_id(sensor_model):
+    """Content ID of a calibration sensor model (names like the default "ir_model" are not unique), or None."""
+    return content_id(sensor_model.to_dict()) if sensor_model is not None else None
+
+
+def result_key(config, episodes, steps, arena, seed, max_collisions=None, base=SIMULATION, sensor_model=None):
+    """Content ID of the evaluate() result of one configuration."""
+    return content_id({
+        'simulator': 'batch_sim',
+        'config': config_spec(base.with_overrides(config)),
+        'episodes': episodes,
+        'steps': steps,
+        'arena': arena or base.arena,
+        'seed': seed,
+        'max_collisions': max_collisions,
+        'sensor_model': sensor_model,
+    })
+
+
+def evaluate(configs, episodes=8, steps=100, arena=None, seed=0, max_collisions=None, base=SIMULATION,
+             sensor_model=None, cache=None):
+    """Run every configuration for ``episodes`` episodes; one result dict per configuration.
+
+    With ``max_collisions``, episodes are cut short once they collide more
+    often than that (see run_batch). A ``sensor_model`` (see calibration)
+    is applied to every IR reading. With a ``cache`` (a ResultCache or its
+    directory), configurations whose result is stored there are not run
+    again, and new results are added to it.
+    """
+    if cache is None:
+        return _simulate(configs, episodes, steps, arena, seed, max_collisions, base, sensor_model)
+    if not isinstance(cache, ResultCache):
+        cache = ResultCache(cache)
+    keys = [result_key(config, episodes, steps, arena, seed, max_collisions, base, sensor_model) for config in configs]
+    results = [cache.get(key) for key in keys]
+    todo = [i for i, result in enumerate(results) if result is None]
+    if todo:
+        simulated = _simulate([configs[i] for i in todo], episodes, steps, arena, seed, max_collisions, base, sensor_model)
+        for i, result in zip(todo, simulated):
+            cache.put(keys[i], result)
+            results[i] = result
+    # A stored result may have been asked for with different, equivalent overrides
+    return [dict(result, config=config) for config, result in zip(configs, results)]
+
+
+def _simulate(configs, episodes, steps, arena, seed, max_collisions, base, sensor_model):
+    arena = arena or base.arena
+    n = len(configs) * episodes
+    params = stacked_params([base.with_overrides(config) for config in configs], episodes)
+    starts = np.tile(random_starts(arena, episodes, seed), (len(configs), 1))
+    sim = BatchSimulation(n, arena, starts, sensor_model)
+    result = run_batch(sim, BatchController(n, params), steps=steps,
+                       max_collisions=max_collisions)
+    per_config = {key: value.reshape(len(configs), episodes) for key, value in result.items()}
+    return [
+        {
+            'config': config,
+            'collisions': float(per_config['collisions'][i].mean()),
+            'collision_free': float((per_config['collisions'][i] == 0).mean()),
+            'distance': float(per_config['distance'][i].mean()),
+            'obstacle_dodges': float(per_config['obstacle_dodges'][i].mean()),
+            'wall_dodges': float(per_config['wall_dodges'][i].mean()),
+            'terminated': float(per_config['terminated'][i].mean()),
+            'episodes': episodes,
+            'steps': steps,
+            'arena': arena,
+            'seed': seed,
+            'sensor_model': model_id(sensor_model),
+        }
+        for i, config in enumerate(configs)
+    ]
+
+
+def rank(results):
+    """Fewest collisions first, then longest distance, then fewest dodges."""
+    return sorted(results, key=lambda r: (r['collisions'], -r['distance'], r['obstacle_dodges'] + r['wall_dodges']))
+
+
+def load_checkpoint(checkpoint):
+    """Results saved in a checkpoint file; a line cut off by an interrupted write is dropped."""
+    if checkpoint is None or not Path(checkpoint).exists():
+        return []
+    results = []
+    with open(checkpoint) as file:
+        for line in file:
+            try:
+                results.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return results
+
+
+def sweep(configs, episodes=8, steps=100, workers=None, checkpoint=None, chunk_size=32,
+          arena=None, seed=0, base=SIMULATION, sensor_model=None, cache=None):
+    """Evaluate ``configs`` in parallel and return every result, best first.
+
+    Results already in ``checkpoint`` that resolve to the same settings and
+    were run with the same episodes, steps, arena, seed and sensor model are reused; new
+    ones are appended to it chunk by chunk as they finish. A ``cache``
+    directory is shared with every other sweep or optimization using it
+    (see evaluate).
+    """
+    arena = arena or base.arena
+    wanted = {config_key(config, base) for config in configs}
+    settings = {'episodes': episodes, 'steps': steps, 'arena': arena, 'seed': seed,
+                'sensor_model': model_id(sensor_model)}
+    results = [
+        result for result in load_checkpoint(checkpoint)
+        if config_key(result['config'], base) in wanted and all(result.get(k) == v for k, v in settings.items())
+    ]
+    done = {config_key(result['config'], base) for result in results}
+    todo = [config for config in configs if config_key(config, base) not in done]
+    chunks = [todo[i:i + chunk_size] for i in range(0, len(todo), chunk_size)]
+    if chunks:
+        workers = min(workers or os.cpu_count() or 1, len(chunks))
+        output = open(checkpoint, 'a') if checkpoint is not None else None
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(evaluate, chunk, episodes, steps, arena, seed, base=base,
+                                       sensor_model=sensor_model, cache=cache) for chunk in chunks]
+                evaluated = 0
+                for future in as_completed(futures):
+                    chunk_results = future.result()
+                    evaluated += len(chunk_results)
+                    results.extend(chunk_results)
+                    if output is not None:
+                        output.writelines(json.dumps(result) + '\n' for result in chunk_results)
+                        output.flush()
+                    print(f"Evaluated {evaluated}/{len(todo)} configurations")
+        finally:
+            if output is not None:
+                output.close()
+    return rank(results)
+
+
+if __name__ == "__main__":
+    checkpoint = sys.argv[1] if len(sys.argv) > 1 else 'sweep.jsonl'
+    ranked = sweep(random_configs(SEARCH_SPACE, 256, seed=0), checkpoint=checkpoint)
+    for result in ranked[:5]:
+        print(json.dumps(result))
@@ -1,99 +1,57 @@
 import cv2
-import matplotlib.pyplot as plt
 import csv
+import ast
+import json
+import logging
 from data_files import FIGRURES_DIR
 from robobo_interface import IRobobo, SimulationRobobo, HardwareRobobo
 import os
+from functools import partial
 from datetime import datetime
+from .scheduler import DeadlineScheduler, Preempted
+from .sampler import SensorSampler
+from .recorder import EpisodeRecorder, iter_sensor_readings
+from .episode_format import records_from_stream, save_episode
+from .plotting import default_worker, render_sensor_plot
+from .instrument import TIMINGS_FILE, InstrumentedRobobo
+from .events import EventLog, emit
+from .config import SIMULATION
+from .decisions import big_dodge, config_thresholds, decide, obstacle_dodge
 
 
+log = logging.getLogger(__name__)
+
 current_datetime = datetime.now().strftime("%Y%m%d-%H%M%S")
 
-simulation = True
-multiple_runs = True
-count_runs = 5
-
-type_arena = "similar_to_irl_gp"
-
-# Sensor thresholds (all)
-SENSOR_THRESHOLDS = {
-    'BackL': 10,
-    'BackR': 10,
-    'FrontL': 10,
-    'FrontR': 10,
-    'FrontC': 10,
-    'FrontRR': 10,
-    'BackC': 60,
-    'FrontLL': 10,
-}
-
-CONSECUTIVE = 5
-
-if simulation:
-    # Thresholds specific to simulation
-    SENSOR_DODGE_THRESHOLDS = {
-        'FrontC': 31,
-        'FrontRR': 50,
-        'FrontLL': 50,
-        'FrontL': 380,
-        'FrontR': 380,
-    }
+deferred_plots = True  # render plots on a background thread while the next episode runs
 
-    BIG_DODGE_THRESHOLDS = {
-        'FrontC': 250,
-        'FrontRR': 250,
-        'FrontLL': 250,
-    }
-    
-    WHEEL_SPEED = 77
-    MOVE_BACK = -WHEEL_SPEED, -WHEEL_SPEED, 900
-    # TURN_RIGHT = WHEEL_SPEED, -WHEEL_SPEED, 500
-    # TURN_LEFT = -WHEEL_SPEED, WHEEL_SPEED, 500
-    TURN_RIGHT = 25, -25, 650
-    TURN_LEFT = -25, 25, 650
-    MOVE_FORWARD = WHEEL_SPEED, WHEEL_SPEED, 350
-else:
-    # Thresholds specific to hardware
-    SENSOR_DODGE_THRESHOLDS = {
-        'FrontC': 11,
-        'FrontRR': 15,
-        'FrontLL': 15,
-        'FrontL': 80,
-        'FrontR': 80,
-    }
+# Settings used when no config is passed (ControllerConfig.from_file, or SIMULATION / HARDWARE)
+DEFAULT_CONFIG = SIMULATION
 
-    BIG_DODGE_THRESHOLDS = {
-        'FrontC': 90,
-        'FrontRR': 90,
-        'FrontLL': 90,
-    }
-    
-    WHEEL_SPEED = 50
-    MOVE_BACK = -WHEEL_SPEED, -WHEEL_SPEED, 900
-    TURN_RIGHT = 25, -25, 650
-    TURN_LEFT = -25, 25, 650
-    MOVE_FORWARD = WHEEL_SPEED, WHEEL_SPEED, 350
-
-def create_output_dirs(simulation, run):
-    sim_or_hard = "_sim" if simulation else "_hard"
-    if multiple_runs:
-        grouped_data_dir = FIGRURES_DIR / "grouped_data" / f"runs{count_runs}_{current_datetime}" / f"{current_datetime}{sim_or_hard}_{type_arena}_run{run}"
+def batch_dir(runs):
+    return FIGRURES_DIR / "grouped_data" / f"runs{runs}_{current_datetime}"
+
+def create_output_dirs(config, run):
+    sim_or_hard = "_sim" if config.simulation else "_hard"
+    if run is not None:
+        grouped_data_dir = batch_dir(config.count_runs) / f"{current_datetime}{sim_or_hard}_{config.arena}_run{run}"
     else:
-        grouped_data_dir = FIGRURES_DIR / "grouped_data" / f"{current_datetime}{sim_or_hard}_{type_arena}"
+        grouped_data_dir = FIGRURES_DIR / "grouped_data" / f"{current_datetime}{sim_or_hard}_{config.arena}"
 
     os.makedirs(grouped_data_dir, exist_ok=True)
     return grouped_data_dir
 
 def plot_sensor_data(irs, title, grouped_data_dir):
-    plt.figure()
-    for sensor_index in range(len(irs[0])):
-        sensor_values = [data[sensor_index] for data in irs]
-        plt.plot(sensor_values, label=f'Sensor {sensor_index + 1}')
-    plt.xlabel('Steps')
-    plt.ylabel('IR Sensor Values')
-    plt.title(title)
-    plt.legend()
-    plt.savefig(str(grouped_data_dir / f"{title}_sensor_plot_{current_datetime}.png"))
+    filename = grouped_data_dir / f"{title}_sensor_plot_{current_datetime}.png"
+    if deferred_plots:
+        return default_worker().submit_sensor_plot(irs, title, filename)
+    return render_sensor_plot(irs, title, filename)
+
+def wait_for_plots():
+    """Block until every deferred plot has been written."""
+    if deferred_plots:
+        for error in default_worker().wait():
+            print(f"Plot failed: {error}")
 
 def save_to_csv(sensor_readings, filename):
     with open(filename, 'w', newline='') as csvfile:
@@ -104,181 +62,236 @@ def save_to_csv(sensor_readings, filename):
 
 def save_meta_data(metadata, filename, grouped_data_dir):
     with open(grouped_data_dir / filename, 'w') as file:
-        for key, value in metadata.items():
-            file.write(f"{key}: {value}\n")
+        json.dump(metadata, file, indent=2, default=str)
+
+def load_meta_data(filename):
+    """Load metadata saved by save_meta_data, or the key: value text dumps of older runs."""
+    with open(filename) as file:
+        if str(filename).endswith('.json'):
+            return json.load(file)
+        metadata = {}
+        for line in file:
+            key, _, value = line.rstrip('\n').partition(': ')
+            if key == 'irs_logs':
+                continue
+            try:
+                metadata[key] = ast.literal_eval(value)
+            except (ValueError, SyntaxError):
+                metadata[key] = value
+        return metadata
+
+def big_dodge_needed(irs, config=DEFAULT_CONFIG):
+    return bool(big_dodge(irs, config_thresholds(config).big))
+
+def obstacle_dodge_needed(irs, config=DEFAULT_CONFIG):
+    return bool(obstacle_dodge(irs, config_thresholds(config).dodge))
+
+def dodge_needed(irs, config=DEFAULT_CONFIG):
+    return big_dodge_needed(irs, config) or obstacle_dodge_needed(irs, config)
 
-def task0_group_6(rob: IRobobo, steps: int = 100):
-    """Task: Never collide with obstacles or walls. If an obstacle is detected, dodge it. If a wall is detected, dodge it."""
+def back_blocked(irs, config=DEFAULT_CONFIG):
+    return bool(decide(irs, config_thresholds(config)).back_blocked)
+
+def task0_group_6(rob: IRobobo, steps: int = 100, sampler=None, recorder=None, config=DEFAULT_CONFIG):
+    """Task: Never collide with obstacles or walls. If an obstacle is detected, dodge it. If a wall is detected, dodge it.
+
+    With a recorder, steps and dodge events are streamed to it instead of being returned in sensor_readings.
+    """
     sensor_readings = []
     obstacle_dodges = 0
     wall_dodges = 0
     consecutive_obstacle_dodges = 0
     consecutive_wall_dodges = 0
     total_steps = 0
-    irs_logs = []
-    if simulation:
+    # With scheduled=True maneuvers keep polling the IR sensors and end early on a new threat
+    thresholds = config_thresholds(config)
+    scheduler = DeadlineScheduler(rob, config.poll_hz if config.scheduled else None, sampler)
+    wait = scheduler.wait
+    mark_step = rob.mark_step if isinstance(rob, InstrumentedRobobo) else None
+    if config.simulation:
         rob.play_simulation()
         # time.sleep(5)  # Ensure the simulation is properly initialized
         rob.sleep(1)
 
     try:
         for step in range(steps):
-            print(f"Step: {step}")
+            if mark_step is not None:
+                mark_step()
+            emit(log, 'step', step=step)
             total_steps += 1
             if step == 1:
                 rob.move(0, 0, 0)
                 rob.sleep(1.5)  # Robot charges forward if not done
-                print(irs)
+                emit(log, 'settle', irs=irs)
             try:
-                irs = rob.read_irs()
+                irs = scheduler.read_irs()
+                timestamp = scheduler.clock()
             except Exception as e:
-                print(f"Error reading IR sensors: {e}")
+                emit(log, 'read_error', step=step, error=e)
                 break
 
             is_obstacle_dodge = 0
             is_wall_dodge = 0
-            if consecutive_obstacle_dodges >= CONSECUTIVE:
-                print("Too many consecutive obstacle dodges")
-                if irs[6] > SENSOR_THRESHOLDS['BackC']:
-                    rob.move(-50, -50, 800)
+            action = None
+            decision = decide(irs, thresholds)
+            try:
+                if consecutive_obstacle_dodges >= config.consecutive:
+                    emit(log, 'consecutive_obstacle_dodges', step=step)
+                    if decision.back_blocked:
+                        rob.move(-50, -50, 800)
+                        rob.sleep(1)
+                        consecutive_obstacle_dodges = 0
+                    else:
+                        rob.move(*config.move_back)  
+                        rob.sleep(1)
+                        consecutive_obstacle_dodges = 0
+                if consecutive_wall_dodges >= config.consecutive:
+                    emit(log, 'consecutive_wall_dodges', step=step)
+                    rob.move(0, 0, 0)
                     rob.sleep(1)
+                    rob.move(-100, -100, 5000)
+                    consecutive_wall_dodges = 0
+
+                # big dodge condition
+                if decision.wall_dodge:
+                    if recorder is not None:
+                        recorder.record_dodge(step, 'wall_dodge', irs)
+                    action = 'wall_dodge'
+                    wall_dodges += 1
+                    is_wall_dodge = 1
                     consecutive_obstacle_dodges = 0
+                    consecutive_wall_dodges += 1
+                    emit(log, 'wall_dodge', step=step, wall_dodges=wall_dodges, irs=irs)
+                    rob.move(*config.move_back)  
+                    wait(1.5, preempt=partial(back_blocked, config=config))
+                    rob.move(0, 0, 0)  # Stop
+                    rob.move(*(config.turn_left if decision.turn_left else config.turn_right))
+                    rob.sleep(0.85)
+
+                # Obstacle dodge condition
+                elif decision.obstacle_dodge:
+                    emit(log, 'obstacle_dodge', step=step, irs=irs)
+                    if recorder is not None:
+                        recorder.record_dodge(step, 'obstacle_dodge', irs)
+                    action = 'obstacle_dodge'
+                    obstacle_dodges += 1
+                    is_obstacle_dodge = 1
+                    consecutive_obstacle_dodges += 1
+                    consecutive_wall_dodges = 0
+                    rob.move(0, 0, 0)  # Stop
+                    rob.sleep(0.1)
+                    rob.move(*(config.turn_left if decision.turn_left else config.turn_right))
+                    wait(0.85, preempt=partial(big_dodge_needed, config=config))
+
+                # Move forward
                 else:
-                    rob.move(*MOVE_BACK)  
-                    rob.sleep(1)
                     consecutive_obstacle_dodges = 0
-            if consecutive_wall_dodges >= CONSECUTIVE:
-                print("Too many consecutive big dodges")
-                rob.move(0, 0, 0)
-                rob.sleep(1)
-                rob.move(-100, -100, 5000)
-                consecutive_wall_dodges = 0
-
-            # big dodge condition
-            if any(irs[i] > BIG_DODGE_THRESHOLDS[key] for i, key in zip([4, 5, 7], ['FrontC', 'FrontRR', 'FrontLL'])):
-                print("-------------Big Dodge----------------")
-                print(f"\n 'FrontC': {irs[4]}\n 'FrontLL': {irs[7]}\n 'FrontRR': {irs[5]}\n 'FrontL(45)': {irs[2]}\n 'FrontR(45)': {irs[3]}\n 'BackC': {irs[6]}\n 'BackL': {irs[0]}\n 'BackR': {irs[1]}'\n\n")
-                irs_logs.append({'step': step, 'type': 'wall_dodge', 'values': irs})
-                rob.move(*MOVE_BACK)  
-                rob.sleep(1.5)
-                rob.move(0, 0, 0)  # Stop
-                if irs[5] > BIG_DODGE_THRESHOLDS['FrontRR']:
-                    rob.move(*TURN_LEFT)  
-                elif irs[7] > BIG_DODGE_THRESHOLDS['FrontLL']:
-                    rob.move(*TURN_RIGHT)  
-                else:
-                    rob.move(*TURN_RIGHT)  
-                rob.sleep(0.85)
-                
-                wall_dodges += 1
-                is_wall_dodge = 1
-                consecutive_obstacle_dodges = 0
-                consecutive_wall_dodges += 1
-                print(f"Steps run: {step + 1} for wall_dodge: {wall_dodges}")
-
-            # Obstacle dodge condition
-            elif any(irs[i] > SENSOR_DODGE_THRESHOLDS[key] for i, key in zip([4, 5, 7, 2, 3], ['FrontC', 'FrontRR', 'FrontLL', 'FrontL', 'FrontR'])):
-                print("--Obstacle Dodge--")
-                print(f"\n 'FrontC': {irs[4]}\n 'FrontLL': {irs[7]}\n 'FrontRR': {irs[5]}\n 'FrontL(45)': {irs[2]}\n 'FrontR(45)': {irs[3]}\n 'BackC': {irs[6]}\n 'BackL': {irs[0]}\n 'BackR': {irs[1]}'\n\n")
-                irs_logs.append({'step': step, 'type': 'obstacle_dodge', 'values': irs})
-                rob.move(0, 0, 0)  # Stop
-                rob.sleep(0.1)
-                if irs[5] > SENSOR_DODGE_THRESHOLDS['FrontRR']:
-                    rob.move(*TURN_LEFT)  
-                elif irs[7] > SENSOR_DODGE_THRESHOLDS['FrontLL']:
-                    rob.move(*TURN_RIGHT)  
-                else:
-                    rob.move(*TURN_RIGHT)  
-                rob.sleep(0.85)
-                obstacle_dodges += 1
-                is_obstacle_dodge = 1
-                consecutive_obstacle_dodges += 1
-                consecutive_wall_dodges = 0
-
-            # Move forward
-            else:
-                consecutive_obstacle_dodges = 0
-                consecutive_wall_dodges = 0
-                if irs[4] < 5.82:  # median = 5.845700385106792:
-                    print("Clear space ahead")
-                    rob.move(100, 100, 1000)
+                    consecutive_wall_dodges = 0
+                    if decision.clear_space:
+                        emit(log, 'clear_space', step=step)
+                        action = 'clear_space'
+                        rob.move(100, 100, 1000)
+                        wait(0.5, preempt=partial(dodge_needed, config=config))
+                    else:
+                        action = 'forward'
+                        rob.move(*config.move_forward)
+                        wait(0.11, preempt=partial(dodge_needed, config=config))
+                if decision.back_blocked:
+                    rob.move(*config.move_forward)
+                    wait(1, preempt=partial(dodge_needed, config=config))
+                if decision.back_left:
+                    rob.move(*config.turn_right)
                     rob.sleep(0.5)
-                else:
-                    rob.move(*MOVE_FORWARD)
+                    rob.move(*config.move_forward)
+                    rob.sleep(0.11)
+                if decision.back_right:
+                    rob.move(*config.turn_left)
+                    rob.sleep(0.5)
+                    rob.move(*config.move_forward)
                     rob.sleep(0.11)
-            if irs[6] > SENSOR_THRESHOLDS['BackC']:
-                rob.move(*MOVE_FORWARD)
-                rob.sleep(1)
-            if irs[0] > 50:
-                rob.move(*TURN_RIGHT)
-                rob.sleep(0.5)
-                rob.move(*MOVE_FORWARD)
-                rob.sleep(0.11)
-            if irs[1] > 50:
-                rob.move(*TURN_LEFT)
-                rob.sleep(0.5)
-                rob.move(*MOVE_FORWARD)
-                rob.sleep(0.11)
-
-            sensor_readings.append(irs + [is_wall_dodge, is_obstacle_dodge])
+            except Preempted:
+                emit(log, 'preempted', step=step)
+                # The cut-short move would keep driving (a reverse, into whatever preempted it) until the next command
+                rob.move(0, 0, 0)
+
+            if recorder is not None:
+                recorder.record(step, irs, is_wall_dodge, is_obstacle_dodge, action, timestamp)
+            else:
+                sensor_readings.append(irs + [is_wall_dodge, is_obstacle_dodge])
     finally:
-        if simulation:
+        if mark_step is not None:
+            mark_step()
+        if config.simulation:
             rob.stop_simulation()
-        print("Done")
-        print(f"Steps episode: {total_steps}")
+        emit(log, 'episode_end', total_steps=total_steps)
 
     metadata = {
         'obstacle_dodges': obstacle_dodges,
         'wall_dodges': wall_dodges,
         'total_steps': total_steps,
-        'irs_logs': irs_logs,
-        'sensor_thresholds': SENSOR_THRESHOLDS,
-        'sensor_dodge_thresholds': SENSOR_DODGE_THRESHOLDS,
-        'wall_dodge_thresholds': BIG_DODGE_THRESHOLDS,
+        'preemptions': scheduler.preemptions,
+        'sensor_thresholds': config.sensor_thresholds,
+        'sensor_dodge_thresholds': config.sensor_dodge_thresholds,
+        'wall_dodge_thresholds': config.big_dodge_thresholds,
+        'config': config.to_dict(),
     }
 
     return sensor_readings, metadata
 
-def run_all_actions(rob: IRobobo):
-    if multiple_runs:
-        for i in range(count_runs):
-            grouped_data_dir = create_output_dirs(simulation, i)
-            meta_data = {
-                'date_time': current_datetime,
-                'simulation': simulation,
-                'sensor_dodge_thresholds': SENSOR_DODGE_THRESHOLDS,
-                'wall_dodge_thresholds': BIG_DODGE_THRESHOLDS
-            }
-            if isinstance(rob, SimulationRobobo) and simulation:
-                rob.play_simulation()
-
-            sensor_readings, task_metadata = task0_group_6(rob, steps=100)
-            meta_data.update(task_metadata)
-            save_meta_data(meta_data, 'meta_data_final.txt', grouped_data_dir)
-            save_to_csv(sensor_readings, str(grouped_data_dir / f"data_{current_datetime}.csv"))
-            plot_sensor_data(sensor_readings, 'Task0 Group6', grouped_data_dir)
-
-            if isinstance(rob, SimulationRobobo) and simulation:
-                rob.stop_simulation()
+def run_episode(rob: IRobobo, grouped_data_dir, steps: int = 100, config=DEFAULT_CONFIG, run_id=None):
+    """Run one task0_group_6 episode and save its data, metadata and plot to grouped_data_dir."""
+    meta_data = {
+        'date_time': current_datetime,
+        'simulation': config.simulation,
+        'sensor_dodge_thresholds': config.sensor_dodge_thresholds,
+        'wall_dodge_thresholds': config.big_dodge_thresholds
+    }
+    if run_id is not None:
+        # Only episodes fully determined by their inputs have one (see runs)
+        meta_data['run_id'] = run_id
+    if config.sampled and not isinstance(rob, HardwareRobobo):
+        # Simulators only advance while the controller drives them; a sampler thread races their clock
+        raise ValueError(f"sampled=True needs a HardwareRobobo, not {type(rob).__name__}")
+    if isinstance(rob, SimulationRobobo) and config.simulation:
+        rob.play_simulation()
+
+    sampler = None
+    if config.sampled:
+        sampler = SensorSampler(rob, config.sample_hz, capacity=int(config.sample_hz * 600)).start()
+    # The sampler polls the bare robot so its reads stay out of the step timings
+    controlled = InstrumentedRobobo(rob) if config.timed else rob
+    stream = grouped_data_dir / f"steps_{current_datetime}.csv"
+    dodge_events = grouped_data_dir / f"dodge_events_{current_datetime}.csv"
+    try:
+        with EventLog(grouped_data_dir / "events.jsonl"), EpisodeRecorder(stream, dodge_filename=dodge_events) as recorder:
+            _, task_metadata = task0_group_6(controlled, steps=steps, sampler=sampler, recorder=recorder, config=config)
+    finally:
+        if sampler is not None:
+            sampler.stop()
+            sampler.save(grouped_data_dir / "ir_samples.npz")
+        if config.timed:
+            controlled.save(grouped_data_dir / TIMINGS_FILE)
+    meta_data.update(task_metadata)
+    if config.timed:
+        meta_data['timings'] = controlled.summary()
+    save_meta_data(meta_data, 'meta_data_final.json', grouped_data_dir)
+    save_to_csv(iter_sensor_readings(stream), str(grouped_data_dir / f"data_{current_datetime}.csv"))
+    save_episode(grouped_data_dir / f"episode_{current_datetime}.rbep", records_from_stream(stream), meta_data)
+    plot_sensor_data(list(iter_sensor_readings(stream)), 'Task0 Group6', grouped_data_dir)
+
+    if isinstance(rob, SimulationRobobo) and config.simulation:
+        rob.stop_simulation()
+    return meta_data
+
+def run_all_actions(rob: IRobobo, config=DEFAULT_CONFIG):
+    if config.multiple_runs:
+        for i in range(config.count_runs):
+            grouped_data_dir = create_output_dirs(config, i)
+            run_episode(rob, grouped_data_dir, steps=100, config=config)
     else:
-        grouped_data_dir = create_output_dirs(simulation, None)
-        meta_data = {
-            'date_time': current_datetime,
-            'simulation': simulation,
-            'sensor_dodge_thresholds': SENSOR_DODGE_THRESHOLDS,
-            'wall_dodge_thresholds': BIG_DODGE_THRESHOLDS
-        }
-        if isinstance(rob, SimulationRobobo) and simulation:
-            rob.play_simulation()
-
-        sensor_readings, task_metadata = task0_group_6(rob, steps=100)
-        meta_data.update(task_metadata)
-        save_meta_data(meta_data, 'meta_data_final.txt', grouped_data_dir)
-        save_to_csv(sensor_readings, str(grouped_data_dir / f"data_{current_datetime}.csv"))
-        plot_sensor_data(sensor_readings, 'Task0 Group6', grouped_data_dir)
-
-        if isinstance(rob, SimulationRobobo) and simulation:
-            rob.stop_simulation()
+        grouped_data_dir = create_output_dirs(config, None)
+        run_episode(rob, grouped_data_dir, steps=100, config=config)
+    wait_for_plots()
 
 #######################################################################################################################################################
 
@@ -416,7 +429,7 @@ def run_all_actions(rob: IRobobo):
 #             irs = rob.read_irs()
 #             is_obstacle_dodge = 0
 #             is_wall_dodge = 0
-#             if consecutive_obstacle_dodges >= CONSECUTIVE:
+#             if consecutive_obstacle_dodges >= config.consecutive:
 #                 print("Too many consecutive obstacle dodges")
 #                 if irs[6] > SENSOR_THRESHOLDS['BackC']:
 #                     rob.move(-50, -50, 800)
@@ -426,7 +439,7 @@ def run_all_actions(rob: IRobobo):
 #                     rob.move(*MOVE_BACK)  
 #                     rob.sleep(1)
 #                     consecutive_obstacle_dodges = 0
-#             if consecutive_wall_dodges >= CONSECUTIVE:
+#             if consecutive_wall_dodges >= config.consecutive:
 #                 print("Too many consecutive wall dodges")
 #                 rob.move(0,0,0)
 #                 rob.sleep(1)
@@ -517,8 +530,7 @@ def run_all_actions(rob: IRobobo):
 #         'obstacle_dodges': obstacle_dodges,
 #         'wall_dodges': wall_dodges,
 #         'total_steps': total_steps,
-#         'irs_logs': irs_logs,
-#         'sensor_thresholds': SENSOR_THRESHOLDS,
+# #         'sensor_thresholds': SENSOR_THRESHOLDS,
 #         'sensor_dodge_thresholds': SENSOR_DODGE_THRESHOLDS,
 #         'wall_dodge_thresholds': BIG_DODGE_THRESHOLDS,
 #     }
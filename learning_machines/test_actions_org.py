@@ -1,3 +1,5 @@
+import asyncio
+
 import cv2
 
 from data_files import FIGRURES_DIR
@@ -10,6 +12,7 @@ from robobo_interface import (
     SimulationRobobo,
     HardwareRobobo,
 )
+from .async_robobo import AsyncRobobo
 
 
 def test_emotions(rob: IRobobo):
@@ -37,6 +40,21 @@ def test_sensors(rob: IRobobo):
     print("Current orientation: ", rob.read_orientation())
 
 
+async def _read_snapshot(rob: IRobobo):
+    async with AsyncRobobo(rob) as arob:
+        return await arob.snapshot()
+
+
+def test_sensors_async(rob: IRobobo):
+    snapshot = asyncio.run(_read_snapshot(rob))
+    print("IRS data: ", snapshot['irs'])
+    cv2.imwrite(str(FIGRURES_DIR / "photo.png"), snapshot['image'])
+    print("Phone pan: ", snapshot['pan'])
+    print("Phone tilt: ", snapshot['tilt'])
+    print("Current acceleration: ", snapshot['accel'])
+    print("Current orientation: ", snapshot['orientation'])
+
+
 def test_phone_movement(rob: IRobobo):
     rob.set_phone_pan_blocking(20, 100)
     print("Phone pan after move to 20: ", rob.read_phone_pan())
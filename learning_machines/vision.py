@@ -0,0 +1,232 @@
+"""Colour-blob detection on the front camera, cheap enough for every control step.
+
+BlobDetector crops a frame to a band of rows (the floor ahead, where
+obstacles and targets appear), downscales it, thresholds it in HSV and
+returns each blob's bearing, size and a distance estimate, so the
+controller can use them alongside read_irs:
+
+    detector = BlobDetector('green')
+    with grabber.latest() as frame:
+        target = detector.largest(frame.image) if frame is not None else None
+    if target is not None and abs(target.bearing) < 10:
+        ...
+
+The working buffers are allocated once per frame size and reused. On
+a 640x480 frame with the default quarter scale, detection takes well
+under a millisecond of CPU. Benchmark it on frames a FrameGrabber saved:
+
+    python -m learning_machines.vision grouped_data/.../frames --color green
+
+While the robot stands still or turns slowly, consecutive frames hardly
+differ. CachedDetector wraps a detector and skips it until a cheap
+thumbnail difference says the scene has changed (--threshold in the
+benchmark).
+"""
+import argparse
+import math
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+import cv2
+import numpy as np
+
+from .config import SIMULATION
+from .instrument import summarize
+
+# HSV ranges per colour (OpenCV hue is 0-179); red wraps around hue 0
+COLORS = {
+    'green': [((40, 70, 40), (85, 255, 255))],
+    'red': [((0, 120, 70), (10, 255, 255)), ((170, 120, 70), (179, 255, 255))],
+    'blue': [((95, 120, 50), (130, 255, 255))],
+}
+
+HORIZONTAL_FOV = 62.0   # degrees, approximate for the phone's front camera
+OBJECT_WIDTH = 0.08     # metres, the width of the arena's target blocks
+
+
+class Blob(NamedTuple):
+    bearing: float    # degrees, positive to the left of the heading like the IR mounting angles
+    area: float       # fraction of the region of interest
+    distance: float   # metres, from the apparent width of an OBJECT_WIDTH wide object
+    x: float          # centroid in full-frame pixel coordinates
+    y: float
+    width: float      # bounding box in full-frame pixels
+    height: float
+
+
+class BlobDetector:
+    """Finds blobs of one colour in the rows ``roi`` (fractions of the height) at ``scale``."""
+
+    def __init__(self, color='green', scale=0.25, roi=(0.35, 1.0), min_area=0.002,
+                 fov=HORIZONTAL_FOV, object_width=OBJECT_WIDTH):
+        self.ranges = [(np.array(low, dtype=np.uint8), np.array(high, dtype=np.uint8))
+                       for low, high in (COLORS[color] if isinstance(color, str) else color)]
+        self.scale = scale
+        self.roi = roi
+        self.min_area = min_area
+        self.fov = fov
+        self.object_width = object_width
+        self._shape = None
+        self._kernel = np.ones((3, 3), np.uint8)
+
+    def _allocate(self, shape):
+        height, width = shape[:2]
+        self._top, bottom = int(height * self.roi[0]), int(height * self.roi[1])
+        self._size = (max(int(width * self.scale), 1), max(int((bottom - self._top) * self.scale), 1))
+        self._bottom = bottom
+        small_w, small_h = self._size
+        self._small = np.empty((small_h, small_w, 3), np.uint8)
+        self._hsv = np.empty_like(self._small)
+        self._mask = np.empty((small_h, small_w), np.uint8)
+        self._part = np.empty_like(self._mask)
+        self._focal = (width / 2) / math.tan(math.radians(self.fov / 2))
+        self._shape = shape
+
+    def mask(self, image):
+        """The colour mask of the downscaled region of interest (a reused buffer)."""
+        if image.shape != self._shape:
+            self._allocate(image.shape)
+        cv2.resize(image[self._top:self._bottom], self._size, dst=self._small, interpolation=cv2.INTER_LINEAR)
+        cv2.cvtColor(self._small, cv2.COLOR_BGR2HSV, dst=self._hsv)
+        low, high = self.ranges[0]
+        cv2.inRange(self._hsv, low, high, dst=self._mask)
+        for low, high in self.ranges[1:]:
+            cv2.inRange(self._hsv, low, high, dst=self._part)
+            cv2.bitwise_or(self._mask, self._part, dst=self._mask)
+        return cv2.morphologyEx(self._mask, cv2.MORPH_OPEN, self._kernel, dst=self._mask)
+
+    def detect(self, image):
+        """Blobs in a BGR frame, largest first."""
+        mask = self.mask(image)
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        roi_area = mask.shape[0] * mask.shape[1]
+        frame_width = image.shape[1]
+        blobs = []
+        for contour in contours:
+            area = cv2.contourArea(contour) / roi_area
+            if area < self.min_area:
+                continue
+            x, y, w, h = cv2.boundingRect(contour)
+            moments = cv2.moments(contour)
+            cx = moments['m10'] / moments['m00'] if moments['m00'] else x + w / 2
+            cy = moments['m01'] / moments['m00'] if moments['m00'] else y + h / 2
+            cx, cy = cx / self.scale, cy / self.scale + self._top
+            width, height = w / self.scale, h / self.scale
+            bearing = math.degrees(math.atan2(frame_width / 2 - cx, self._focal))
+            distance = self.object_width * self._focal / width
+            blobs.append(Blob(bearing, area, distance, cx, cy, width, height))
+        return sorted(blobs, key=lambda blob: blob.area, reverse=True)
+
+    def largest(self, image):
+        """The largest blob in a frame, or None."""
+        blobs = self.detect(image)
+        return blobs[0] if blobs else None
+
+
+class CachedDetector:
+    """Reuses the last result of ``detector`` until the scene changes.
+
+    Each frame is reduced to a ``thumbnail`` sized copy of the detector's
+    region of interest and compared with the thumbnail of the frame last
+    processed. A thumbnail pixel has changed when any channel differs by
+    more than ``threshold`` (in 0-255 intensity steps); while fewer than
+    ``min_changed`` of the pixels have, the cached result is returned.
+    Counting pixels rather than averaging them means an object moving
+    across an otherwise still scene is noticed. After ``max_age`` frames
+    the detector runs again anyway. Comparing against the last processed
+    frame rather than the previous one keeps slow drift from piling up
+    unnoticed.
+    """
+
+    def __init__(self, detector, threshold=24.0, thumbnail=(64, 48), max_age=30, min_changed=0.002):
+        self.detector = detector
+        self.threshold = threshold
+        self.min_changed = min_changed
+        self.thumbnail = thumbnail
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._current = np.empty((thumbnail[1], thumbnail[0], 3), np.uint8)
+        self._reference = np.empty_like(self._current)
+        self._diff = np.empty_like(self._current)
+        self._peak = np.empty(self._current.shape[:2], np.uint8)
+        self._result = None
+        self._age = None  # frames since the last processed one; None before the first
+
+    def changed(self, image):
+        """Whether enough of ``image`` differs from the last processed frame."""
+        height = image.shape[0]
+        top, bottom = int(height * self.detector.roi[0]), int(height * self.detector.roi[1])
+        cv2.resize(image[top:bottom], self.thumbnail, dst=self._current, interpolation=cv2.INTER_LINEAR)
+        if self._age is None or self._age >= self.max_age:
+            return True
+        cv2.absdiff(self._current, self._reference, dst=self._diff)
+        np.max(self._diff, axis=2, out=self._peak)
+        cv2.threshold(self._peak, self.threshold, 255, cv2.THRESH_BINARY, dst=self._peak)
+        return cv2.countNonZero(self._peak) >= self.min_changed * self._peak.size
+
+    def detect(self, image):
+        if self.changed(image):
+            self._result = self.detector.detect(image)
+            self._current, self._reference = self._reference, self._current
+            self._age = 0
+            self.misses += 1
+        else:
+            self._age += 1
+            self.hits += 1
+        return self._result
+
+    def largest(self, image):
+        blobs = self.detect(image)
+        return blobs[0] if blobs else None
+
+    def reset(self):
+        self._age = None
+
+
+def load_frames(path):
+    """The frames saved by a FrameGrabber (.jpg, .png or .npy) in a directory, in capture order."""
+    frames = []
+    for filename in sorted(Path(path).iterdir()):
+        if filename.suffix == '.npy':
+            frames.append(np.load(filename))
+        elif filename.suffix in ('.jpg', '.png'):
+            frames.append(cv2.imread(str(filename)))
+    return frames
+
+
+def benchmark(detector, frames, repeat=5):
+    """summarize() of the per-frame detect() times over ``repeat`` passes, plus detections per pass."""
+    durations = []
+    detections = 0
+    for _ in range(repeat):
+        detections = 0
+        for frame in frames:
+            start = time.perf_counter()
+            detections += bool(detector.detect(frame))
+            durations.append(time.perf_counter() - start)
+    result = dict(summarize(durations), frames=len(frames), frames_with_blobs=detections)
+    if isinstance(detector, CachedDetector):
+        result['cache_hit_rate'] = detector.hits / max(detector.hits + detector.misses, 1)
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark BlobDetector on recorded frames")
+    parser.add_argument('frames', help="directory of frames saved by a FrameGrabber")
+    parser.add_argument('--color', default='green', choices=sorted(COLORS))
+    parser.add_argument('--scale', type=float, default=0.25)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--threshold', type=float, help="wrap the detector in a CachedDetector with this per-pixel change threshold")
+    args = parser.parse_args()
+    frames = load_frames(args.frames)
+    if not frames:
+        raise SystemExit(f"No frames in {args.frames}")
+    detector = BlobDetector(args.color, scale=args.scale)
+    if args.threshold is not None:
+        detector = CachedDetector(detector, args.threshold)
+    result = benchmark(detector, frames, args.repeat)
+    period_ms = 1000 / SIMULATION.poll_hz
+    print(result)
+    print(f"p99 {result['p99_ms']:.3f} ms = {result['p99_ms'] / period_ms:.1%} of a {period_ms:.0f} ms control period")
@@ -0,0 +1,22 @@
+import numpy as np
+import pytest
+
+from learning_machines.batch_sim import BatchController, BatchSimulation, random_starts, run_batch
+from learning_machines.local_sim import LocalRobobo
+from learning_machines.task0_g6 import task0_group_6
+
+STEPS = 100
+
+
+@pytest.mark.parametrize('start', [tuple(pose) for pose in random_starts("similar_to_irl_gp", 6, 0)])
+def test_single_robot_batch_matches_local_episode(start):
+    result = run_batch(BatchSimulation(1, starts=[start]), BatchController(1), steps=STEPS, record=True)
+
+    rob = LocalRobobo(start=start)
+    readings, metadata = task0_group_6(rob, steps=STEPS)
+
+    np.testing.assert_allclose(result['sensor_readings'][0], np.array(readings), atol=1e-6)
+    assert result['obstacle_dodges'][0] == metadata['obstacle_dodges']
+    assert result['wall_dodges'][0] == metadata['wall_dodges']
+    assert result['collisions'][0] == rob.last_episode['collisions']
+    assert result['sim_time'][0] == pytest.approx(rob.last_episode['sim_time'])
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from learning_machines.config import HARDWARE, SIMULATION
+from learning_machines.decisions import config_thresholds, decide
+
+
+def original_branches(irs, config):
+    """The dodge branches of task0_group_6 as they were written before decisions.py."""
+    dodge, big = config.sensor_dodge_thresholds, config.big_dodge_thresholds
+    wall = any(irs[i] > big[key] for i, key in zip([4, 5, 7], ['FrontC', 'FrontRR', 'FrontLL']))
+    obstacle = not wall and any(irs[i] > dodge[key] for i, key in
+                                zip([4, 5, 7, 2, 3], ['FrontC', 'FrontRR', 'FrontLL', 'FrontL', 'FrontR']))
+    forward = not wall and not obstacle
+    if wall:
+        turn_left = irs[5] > big['FrontRR']
+    elif obstacle:
+        turn_left = irs[5] > dodge['FrontRR']
+    else:
+        turn_left = False
+    return {
+        'wall_dodge': wall,
+        'obstacle_dodge': obstacle,
+        'forward': forward,
+        'clear_space': forward and irs[4] < 5.82,
+        'turn_left': turn_left,
+        'back_blocked': irs[6] > config.sensor_thresholds['BackC'],
+        'back_left': irs[0] > 50,
+        'back_right': irs[1] > 50,
+    }
+
+
+def readings(config, n=2000, seed=0):
+    """Random readings spread around every threshold of ``config``, plus readings exactly on them."""
+    rng = np.random.default_rng(seed)
+    irs = rng.choice([5.8, 5.82, 10.0, 40.0], size=(n, 8))
+    scale = np.exp(rng.uniform(np.log(1), np.log(2000), size=(n, 8)))
+    irs = np.where(rng.random((n, 8)) < 0.3, scale, irs)
+    on_threshold = irs[:len(config.sensor_dodge_thresholds)].copy()
+    for row, (i, key) in zip(on_threshold, zip([4, 5, 7, 2, 3], ['FrontC', 'FrontRR', 'FrontLL', 'FrontL', 'FrontR'])):
+        row[i] = config.sensor_dodge_thresholds[key]
+    return np.concatenate([irs, on_threshold])
+
+
+@pytest.mark.parametrize('config', [SIMULATION, HARDWARE], ids=['simulation', 'hardware'])
+def test_decide_matches_original_branches(config):
+    irs = readings(config)
+    thresholds = config_thresholds(config)
+    batch = decide(irs, thresholds)
+    for k, row in enumerate(irs):
+        expected = original_branches(row.tolist(), config)
+        single = decide(row.tolist(), thresholds)
+        for name, value in expected.items():
+            assert bool(getattr(single, name)) == value, (name, row)
+            assert bool(getattr(batch, name)[k]) == value, (name, row)
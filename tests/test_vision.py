@@ -0,0 +1,32 @@
+import numpy as np
+
+from learning_machines.vision import BlobDetector, CachedDetector
+
+
+def frame(x, noise, width=40, height=60):
+    """A 640x480 grey frame with camera-like noise and a green block at column ``x``."""
+    image = np.clip(110 + noise, 0, 255).astype(np.uint8)
+    image[320:320 + height, x:x + width] = (40, 200, 40)
+    return image
+
+
+def test_cached_detector_recomputes_when_a_blob_moves():
+    rng = np.random.default_rng(0)
+    frames = [frame(100 if i < 3 else 500, rng.normal(0, 3, (480, 640, 3))) for i in range(6)]
+    detector = CachedDetector(BlobDetector('green'))
+
+    before = [detector.largest(image) for image in frames[:3]]
+    assert detector.misses == 1 and detector.hits == 2
+
+    after = detector.largest(frames[3])
+    assert detector.misses == 2
+    assert before[-1].bearing > 0 > after.bearing
+    assert after.x == BlobDetector('green').largest(frames[3]).x
+
+
+def test_cached_detector_skips_unchanged_frames():
+    rng = np.random.default_rng(1)
+    detector = CachedDetector(BlobDetector('green'))
+    for _ in range(10):
+        detector.detect(frame(300, rng.normal(0, 3, (480, 640, 3))))
+    assert detector.misses == 1 and detector.hits == 9